@@ -1,13 +1,76 @@
 #!/usr/bin/env python
 import argparse
 import sys
-from distutils.util import strtobool  # This is to fix argparse's lame boolean handling
+import time
 
-from sense_hat_display_utils.utility import SenseHatUtility, Colour
+from sense_hat_display_utils import defaults
+
+# The public SenseHatUtility actions. Listed in defaults rather than read from the class so that --help,
+# argument errors and thin client mode don't have to import PIL and sense_hat. show_pixels takes a list of pixels,
+# which there's no option for, and live_clock never finishes, so it's only run from here.
+ACTIONS = tuple(action for action in defaults.FINITE_ACTIONS if action != "show_pixels") + ("live_clock",)
+# Actions that change what's already on the display, which --export starts from the --name icon or a --colour display
+EXPORT_FROM_START = ("fade_out", "fade_to", "crossfade")
+# Command-line options that set up the display rather than being passed to the action
+SETTINGS = (
+    "action",
+    "socket",
+    "autorestore",
+    "display",
+    "fb_device",
+    "record",
+    "rotation",
+    "priority",
+    "ttl",
+    "icon_pack",
+    "export",
+    "render_cache",
+    "tile",
+    "columns",
+    "profile",
+    "profile_out",
+    "lookahead",
+)
+
+
+def strtobool(value):
+    """
+    Convert a string representation of truth to True or False. This is to fix argparse's lame boolean handling.
+
+    Args:
+        value (str): y, yes, t, true, on, 1, n, no, f, false, off or 0 (any case)
+
+    Returns:
+        bool
+
+    Raises:
+        ValueError: if value isn't one of the above
+
+    Examples:
+        >>> strtobool("Yes"), strtobool("0")
+        (True, False)
+
+    """
+    value = value.lower()
+    if value in ("y", "yes", "t", "true", "on", "1"):
+        return True
+    elif value in ("n", "no", "f", "false", "off", "0"):
+        return False
+    else:
+        raise ValueError("invalid truth value {0!r}".format(value))
+
+
+def colour(value):
+    """
+    argparse type for colours: names, "#rrggbb" or "rgb(r, g, b)". Each is parsed once, into a Colour.
+    """
+    from sense_hat_display_utils.colours import Colour
+
+    return Colour(value)
 
 
 def main():
-    available_actions = [i for i in SenseHatUtility.__dict__ if i[:1] != "_" and i == i.lower()]
+    available_actions = list(ACTIONS) + ["serve", "run"]
     parser = argparse.ArgumentParser(
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
         description="Sense HAT Utilities",
@@ -17,36 +80,149 @@ def main():
     # Optional arguments with defaults
     parser.add_argument("-a", "--autorestore", type=strtobool, default=False, choices=[True, False],
                         help="Restore the previous display when done. Can be useful to set this to True when using the 'scroll' and 'pulse' actions")
-    parser.add_argument("-c", "--colour", "--color", type=Colour, default="white", help="Output colour")
-    parser.add_argument("-bg", "--background_colour", "--background_color", type=Colour, default="black",
+    parser.add_argument("-c", "--colour", "--color", type=colour, default=defaults.DEFAULT_FOREGROUND, help="Output colour")
+    parser.add_argument("-bg", "--background_colour", "--background_color", type=colour, default=defaults.DEFAULT_BACKGROUND,
                         help="Output background colour")
     parser.add_argument("-i", "--invert", type=strtobool, default=False,
                         help="Invert text foreground and background colours")
-    parser.add_argument("-f", "--font", default=SenseHatUtility.DEFAULT_FONT,
+    parser.add_argument("-f", "--font", default=defaults.DEFAULT_FONT,
                         help="Full path to font used for displaying text")
-    parser.add_argument("--font_size", type=int, default=SenseHatUtility.DEFAULT_FONT_SIZE,
+    parser.add_argument("--font_size", type=int, default=defaults.DEFAULT_FONT_SIZE,
                         help="Point size to use for TrueType fonts")
-    parser.add_argument("-y", "--font_y_offset", type=int, default=SenseHatUtility.DEFAULT_Y_OFFSET,
+    parser.add_argument("-y", "--font_y_offset", type=int, default=defaults.DEFAULT_Y_OFFSET,
                         help="Offset text display up (negative values) or down (positive values)")
+    parser.add_argument("--display", choices=["sense_hat", "framebuffer", "virtual"], default="sense_hat",
+                        help="Drive the display through the sense_hat library, write straight to its framebuffer, "
+                             "or use an in-memory stand-in (see --record)")
+    parser.add_argument("--fb_device", help="Framebuffer device for --display framebuffer (found automatically if not set)")
+    parser.add_argument("--tile", action="append", default=[],
+                        help="Show the action across a wall of panels instead, one --tile per panel, left to right then "
+                             "top to bottom: sense_hat, virtual, framebuffer[:/dev/fbN] or remote:/path/to/server.sock")
+    parser.add_argument("--columns", type=int, help="Panels per row of the --tile wall (default: all in one row)")
+    parser.add_argument("--record", help="With --display virtual, save the frames shown as an animated GIF or PNG")
+    parser.add_argument("--export",
+                        help="Instead of showing the action, save it as an animation file for the 'play' action. "
+                             "It's worked out in virtual time, so this doesn't take as long as the action would. "
+                             "Fades start from the --name icon, or a display of --colour")
+    parser.add_argument("--render_cache",
+                        help="Keep rendered messages in this directory as well as in memory, "
+                             "so they're reused after a restart")
+    parser.add_argument("--lookahead", type=int, default=0,
+                        help="Prepare this many frames ahead on another thread, so a slow frame doesn't hold up the "
+                             "one being shown. Helps on a busy Pi")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each stage of showing frames (render, convert, push, wait) and print a summary "
+                             "to stderr when done")
+    parser.add_argument("--profile_out",
+                        help="Profile as with --profile, and also save the stats to this file as JSON")
     parser.add_argument("--rotation", type=int, choices=[0, 90, 180, 270], default=180,
                         help="Set the rotation of the screen")
     parser.add_argument("-s", "--speed", type=float, default=0.05,
-                        help="The number of seconds each frame is held when animating")
+                        help="Seconds per frame when animating. Frames are dropped rather than running slow")
     parser.add_argument("-r", "--repeat", type=int, default=1,
                         help="The number of times to repeat an action. -1 = repeat until killed with CTRL+C")
+    parser.add_argument("--easing", choices=["linear", "ease_in", "ease_out", "ease_in_out"], default="linear",
+                        help="How fades speed up and slow down")
+    parser.add_argument("--coalesce", choices=["none", "join", "drop_oldest", "keep_latest"], default="none",
+                        help="When 'scroll' reads stdin and lines arrive faster than they scroll: show them all, join "
+                             "waiting lines into one message, drop the oldest, or only show the latest")
+    parser.add_argument("--pattern", choices=["ring", "ripple", "spiral", "radar", "diamond"], default="ripple",
+                        help="Pattern for the 'animate' action")
     # Optional arguments without defaults
+    parser.add_argument("--steps", type=int, help="Number of steps in a fade (default: 2 brightness levels per step)")
+    parser.add_argument("--frame_count", type=int, help="Frames per repetition of the 'animate' action")
+    parser.add_argument("--level", type=float, help="Brightness from 0 to 1 for the 'dim' and 'gamma_pulse' actions")
     parser.add_argument("-m", "--message", help="Display this message instead of reading from stdin")
-    parser.add_argument("-n", "--name", help="Some actions require a name to be passed")
+    parser.add_argument("-n", "--name",
+                        help="Some actions require a name to be passed: an icon for 'show_icon', a file for 'play', "
+                             "a playlist for 'run' (JSON lines or YAML, default stdin)")
+    parser.add_argument("--icon_pack", action="append", default=[],
+                        help="Icon pack file to look up 'show_icon' names in (can be repeated)")
+    parser.add_argument("--socket",
+                        help="Send the action to a display server listening on this Unix socket, or with the 'serve' action, "
+                             "listen on it (default {0})".format(defaults.DEFAULT_SOCKET))
+    parser.add_argument("--priority", type=int, default=0,
+                        help="With --socket, queue priority of the action. Higher priorities interrupt lower ones")
+    parser.add_argument("--ttl", type=float,
+                        help="With --socket, drop the action if the server hasn't started it within this many seconds")
     args = parser.parse_args()
 
+    if args.action not in available_actions and args.action != "example":
+        sys.exit("Unknown action: {0} ".format(args.action))
+
+    if args.socket is not None and args.action == "run":
+        run(args)
+        return
+    if args.socket is not None and args.action != "serve":
+        forward(args)
+        return
+    if args.export is not None:
+        export(args)
+        return
+    if args.action == "play":
+        play(args)
+        return
+
+    # Only now is there any rendering to do
+    from sense_hat_display_utils import icons, server
+    from sense_hat_display_utils.rendercache import RenderCache
+    from sense_hat_display_utils.utility import SenseHatUtility
+
+    for path in args.icon_pack:
+        try:
+            icons.load_pack(path)
+        except (OSError, ValueError) as ex:
+            sys.exit("Error loading icon pack: {0}".format(ex))
+    del args.icon_pack
+
     # Set any settings, then delete them from args, so that they're not passed to SHUtility as **kwargs
-    shu = SenseHatUtility(args.autorestore)
-    del args.autorestore
+    if args.tile:
+        from sense_hat_display_utils.canvas import TiledCanvas, get_tile
+
+        try:
+            display = TiledCanvas([get_tile(spec) for spec in args.tile], args.columns)
+        except (OSError, ValueError) as ex:
+            sys.exit("Error setting up tiles: {0}".format(ex))
+    else:
+        display = args.display
+    shu = SenseHatUtility(args.autorestore, display, args.fb_device)
+    del args.autorestore, args.display, args.fb_device, args.tile, args.columns
+    record = args.record
+    del args.record, args.export
+    if args.render_cache is not None:
+        shu.render_cache = RenderCache(directory=args.render_cache)
+    del args.render_cache
+    profile = args.profile_out
+    if args.profile or profile is not None:
+        from sense_hat_display_utils.profiling import Profiler
+
+        shu.profiler = Profiler()
+    del args.profile, args.profile_out
+    shu.lookahead = args.lookahead
+    del args.lookahead
 
     shu.set_rotation(args.rotation)
     del args.rotation
+    del args.priority, args.ttl
 
-    if args.action == "example":
+    if args.action == "serve":
+        try:
+            display_server = server.DisplayServer(shu, args.socket or defaults.DEFAULT_SOCKET)
+        except OSError as ex:
+            sys.exit("Error starting server: {0}".format(ex))
+        try:
+            display_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            display_server.server_close()
+            shu.close()
+    elif args.action == "run":
+        try:
+            run(args, shu)
+        finally:
+            finish(shu, record, profile)
+    elif args.action == "example":
         # Specific function call:
         if hasattr(args, "message"):
             shu.scroll(args.message, args.colour, args.speed)
@@ -59,8 +235,10 @@ def main():
             # Strip action from args - function won't be expecting them
             action = args.action
             del args.action
+            if action == "show_clock" and args.repeat == -1:
+                action = "live_clock"  # Only wake up when the face changes
             try:
-                if args.repeat is -1:
+                if args.repeat == -1:
                     del args.repeat
                     while True:
                         getattr(shu, action)(**args.__dict__)
@@ -68,9 +246,145 @@ def main():
                     getattr(shu, action)(**args.__dict__)
             except TypeError as ex:
                 sys.exit("Error calling action '{0}': {1}".format(action, ex))
+            finally:
+                finish(shu, record, profile)
         else:
             sys.exit("Unknown action: {0} ".format(args.action))
 
 
+def finish(shu, record, profile):
+    """
+    Save the recording and profile of a run, if they were asked for.
+
+    Args:
+        shu (SenseHatUtility): What ran the action.
+        record (str): The --record file, or None.
+        profile (str): The --profile_out file, or None just to print the summary.
+
+    """
+    if record is not None and hasattr(shu.sh, "save_animation"):
+        shu.sh.save_animation(record)
+    if shu.profiler is not None:
+        shu.profiler.report()
+        if profile is not None:
+            shu.profiler.export(profile)
+
+
+def run(args, shu=None):
+    """
+    Run a playlist of actions, on a display server if --socket is given, so that the whole sequence costs one
+    process start.
+
+    Args:
+        args: Parsed command-line arguments, including name and repeat.
+        shu (SenseHatUtility, optional): Runs the actions, unless they're sent to a server.
+
+    """
+    from sense_hat_display_utils import playlist, server
+
+    try:
+        steps = playlist.load_playlist(args.name)
+    except (OSError, ValueError) as ex:
+        sys.exit("Error reading playlist: {0}".format(ex))
+    if shu is None:
+        def call(action, **kwargs):
+            server.send(action, args.socket, args.priority, args.ttl, **kwargs)
+
+        sleep = time.sleep
+    else:
+        call, sleep = playlist.utility_call(shu), shu._sleep
+    try:
+        if args.repeat == -1:
+            while True:
+                playlist.run_playlist(steps, call, sleep)
+        else:
+            for number in range(args.repeat):
+                playlist.run_playlist(steps, call, sleep)
+    except (OSError, KeyError, TypeError, ValueError, server.DisplayServerError) as ex:
+        sys.exit("Error running playlist: {0}".format(ex))
+
+
+def forward(args):
+    """
+    Thin client mode: send the action to a running display server instead of driving the display from this process.
+
+    Args:
+        args: Parsed command-line arguments, including socket.
+
+    """
+    from sense_hat_display_utils import server
+
+    path = args.socket
+    action = args.action
+    kwargs = {key: value.hex_l if hasattr(value, "hex_l") else value for key, value in args.__dict__.items()
+              if key not in SETTINGS}
+    # The server can't read our stdin, so send it a line at a time
+    message = kwargs.pop("message")
+    messages = sys.stdin if message is None and action == "scroll" else [message]
+    try:
+        for message in messages:
+            server.send(action, path, args.priority, args.ttl, message=message, **kwargs)
+    except (OSError, server.DisplayServerError) as ex:
+        sys.exit("Error calling action '{0}' on server at {1}: {2}".format(action, path, ex))
+
+
+def export(args):
+    """
+    Save the action as an animation file instead of showing it.
+
+    Args:
+        args: Parsed command-line arguments, including export.
+
+    """
+    from sense_hat_display_utils import animfile, icons
+
+    if args.action in ("serve", "run", "play", "live_clock", "example") or args.repeat == -1:
+        sys.exit("Can't export '{0}' with --repeat {1}".format(args.action, args.repeat))
+    for path in args.icon_pack:
+        icons.load_pack(path)
+    kwargs = {key: value for key, value in args.__dict__.items()
+              if key not in SETTINGS}
+    try:
+        if args.action in EXPORT_FROM_START:
+            # The virtual display starts black, so give fades something to fade from
+            if args.name is not None:
+                kwargs["start"] = icons.get_icon(args.name).pixels
+            elif args.action != "fade_to":
+                kwargs["start"] = [list(args.colour.get_rgb_int())] * 64
+        count = animfile.export_action(args.export, args.action, **kwargs)
+    except (AttributeError, KeyError, TypeError, ValueError) as ex:
+        sys.exit("Error exporting action '{0}': {1}".format(args.action, ex))
+    print("Wrote {0} frames to {1}".format(count, args.export))
+
+
+def play(args):
+    """
+    Play an animation file without loading any of the rendering code.
+
+    Args:
+        args: Parsed command-line arguments, including name.
+
+    """
+    from sense_hat_display_utils.animfile import play_animation
+    from sense_hat_display_utils.display import get_display
+
+    display = get_display(args.display, args.fb_device)
+    display.set_rotation(args.rotation)
+    backup = display.get_pixels() if args.autorestore else None
+    try:
+        if args.repeat == -1:
+            while True:
+                play_animation(display, args.name)
+        else:
+            play_animation(display, args.name, args.repeat)
+    except (OSError, ValueError) as ex:
+        sys.exit("Error playing '{0}': {1}".format(args.name, ex))
+    finally:
+        if backup is not None:
+            display.set_pixels(backup)
+        if args.record is not None and hasattr(display, "save_animation"):
+            display.save_animation(args.record)
+
+
 if __name__ == "__main__":
     main()
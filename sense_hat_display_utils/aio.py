@@ -0,0 +1,160 @@
+"""
+Awaitable display actions, for asyncio applications such as Home Assistant custom components.
+
+Frames are paced with asyncio.sleep instead of time.sleep, so one event loop can drive any number of displays without
+a thread each. An action can be cancelled between any two frames, and puts the display back as it found it when it is.
+"""
+import asyncio
+
+from sense_hat_display_utils import defaults
+from sense_hat_display_utils.animation import compile_pattern
+from sense_hat_display_utils.blend import solid
+from sense_hat_display_utils.colours import Colour
+from sense_hat_display_utils.icons import ICONS, get_icon
+from sense_hat_display_utils.pacing import FrameScheduler
+from sense_hat_display_utils.utility import SenseHatUtility
+
+
+class AsyncSenseHatUtility(object):
+    """
+    Awaitable versions of the SenseHatUtility actions.
+
+    Actions on the same display take turns: each one holds the display's lock until it's finished. Don't mix these
+    with the blocking actions, or the queue, on the same display.
+
+    Examples:
+        >>> display = AsyncSenseHatUtility(display="virtual")
+        >>> async def demo():
+        ...     pulse = asyncio.ensure_future(display.pulse("red", speed=0.01, repeat=100))
+        ...     await asyncio.sleep(0.05)
+        ...     pulse.cancel()  # Stops at the next frame and puts back what was there before
+        ...     await display.show_icon("estelada")
+        ...     return pulse.cancelled()
+        >>> asyncio.run(demo()), display.sh.get_pixels()[0]
+        (True, [0, 0, 255])
+
+    """
+
+    def __init__(self, utility=None, **kwargs):
+        """
+        Args:
+            utility (SenseHatUtility, optional): Renders the frames and owns the display. One is created if not given.
+            **kwargs: Arguments for creating a SenseHatUtility, eg. display="virtual".
+        """
+        self.utility = utility if utility is not None else SenseHatUtility(**kwargs)
+        self._lock = None
+        self.frame_stats = None  # FrameScheduler.stats() of the last animation
+
+    @property
+    def sh(self):
+        return self.utility.sh
+
+    @property
+    def lock(self):
+        """
+        The asyncio.Lock that actions on this display take turns with.
+        """
+        if self._lock is None:  # Created on first use, so it belongs to the running event loop on older Pythons
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def scroll(self,
+                     message,
+                     colour=defaults.DEFAULT_FOREGROUND,
+                     background_colour=defaults.DEFAULT_BACKGROUND,
+                     speed=defaults.DEFAULT_SPEED,
+                     font_y_offset=defaults.DEFAULT_Y_OFFSET,
+                     invert=False,
+                     font=defaults.DEFAULT_FONT,
+                     font_size=defaults.DEFAULT_FONT_SIZE,
+                     repeat=1):
+        """
+        Scroll a message across the display.
+
+        Args:
+            message (str): The text to scroll.
+            colour (optional): The colour to display in, as a Colour or anything Colour accepts.
+            background_colour (optional): The colour to display _on_.
+            speed (float, optional): Seconds per frame.
+            font_y_offset (int, optional): Move the text up (negative) or down (positive).
+            invert (bool, optional): Swap the foreground and background colours.
+            font (str, optional): Font file.
+            font_size (int, optional): Point size for TrueType fonts.
+            repeat (int, optional): Number of repetitions.
+
+        """
+        utility = self.utility
+        async with self.lock:
+            utility._use_font(font, font_size)
+            strip = utility._render_strip(message, Colour(colour), Colour(background_colour), font_y_offset, invert)
+            await self._play(strip, speed, repeat)
+
+    async def pulse(self, colour, speed=defaults.DEFAULT_SPEED, repeat=1):
+        """
+        Pulse a colour from 4 pixels lit in the middle to all-but-the-corners lit.
+
+        Args:
+            colour: A Colour or anything Colour accepts.
+            speed (float, optional): Seconds per frame.
+            repeat (int, optional): Number of repetitions.
+
+        """
+        await self.animate("diamond", colour, speed, repeat)
+
+    async def animate(self, pattern, colour, speed=defaults.DEFAULT_SPEED, repeat=1, frame_count=None):
+        """
+        Play a procedural animation. See SenseHatUtility.animate.
+        """
+        frames = compile_pattern(pattern, Colour(colour).get_rgb_int(), frame_count)
+        async with self.lock:
+            await self._play(frames, speed, repeat)
+
+    async def fade_out(self, speed=defaults.DEFAULT_SPEED, steps=None, easing="linear"):
+        """
+        Fade out the display.
+
+        Args:
+            speed (float, optional): Seconds per fade step.
+            steps (int, optional): Number of fade steps. Defaults to one per 2 levels of the brightest channel.
+            easing (str, optional): One of blend.EASINGS.
+
+        """
+        async with self.lock:
+            start = self.sh.get_pixels()
+            frames = self.utility._fade_frames(start, solid([0, 0, 0], len(start)), steps, easing)
+            await self._play(frames, speed, 1)
+
+    async def show_clock(self):
+        """
+        Show the clock.
+        """
+        async with self.lock:
+            self.sh.set_pixels(ICONS.clock().pixels)
+
+    async def show_icon(self, name):
+        """
+        Show an icon by name.
+
+        Raises:
+            KeyError: if there's no icon called name
+        """
+        pixels = get_icon(name).pixels
+        async with self.lock:
+            self.sh.set_pixels(pixels)
+
+    async def _play(self, frames, speed, repeat):
+        # Call with the lock held
+        before = self.sh.get_pixels()
+        scheduler = FrameScheduler(speed)
+        try:
+            for number in range(repeat):
+                for index, wait in scheduler.schedule(len(frames)):
+                    if index is None:
+                        await asyncio.sleep(wait)
+                    else:
+                        self.sh.set_pixels(frames[index])
+        except asyncio.CancelledError:
+            self.sh.set_pixels(before)
+            raise
+        finally:
+            self.frame_stats = scheduler.stats()
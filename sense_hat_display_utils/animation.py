@@ -0,0 +1,130 @@
+"""
+Procedural animations, computed over the whole 8x8 grid at once.
+
+Each pattern is a formula for the brightness of every pixel, in terms of fields describing where
+the pixel is (distance from the centre, angle, ...) and t, how far through the cycle the frame is.
+A whole cycle is evaluated in one go, as NumPy array operations if NumPy is installed, and the
+frames are cached per (pattern, colour, frame count) so repeating an animation costs nothing.
+"""
+import functools
+import math
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, it just makes compiling a pattern cheaper
+    numpy = None
+
+from sense_hat_display_utils.frame import Frame
+
+WIDTH = 8
+HEIGHT = 8
+CACHE_SIZE = 64  # Compiled animations to keep
+
+# Pixel centres, relative to the middle of the display, row by row from the top left. Y goes up.
+_X = [col - (WIDTH - 1) / 2 for row in range(HEIGHT) for col in range(WIDTH)]
+_Y = [(HEIGHT - 1) / 2 - row for row in range(HEIGHT) for col in range(WIDTH)]
+FIELDS = {
+    "x": _X,
+    "y": _Y,
+    "radius": [math.hypot(x, y) for x, y in zip(_X, _Y)],  # Straight-line distance from the centre
+    "square": [max(abs(x), abs(y)) for x, y in zip(_X, _Y)],  # Distance in rings of pixels
+    "diamond": [abs(x) + abs(y) for x, y in zip(_X, _Y)],  # Distance in steps along rows and columns
+    "angle": [math.atan2(y, x) % (2 * math.pi) / (2 * math.pi) for x, y in zip(_X, _Y)],  # 0-1 anticlockwise from 3 o'clock
+}
+MAX_RADIUS = max(FIELDS["radius"])
+
+
+class _ScalarMath(object):
+    """
+    The few NumPy functions patterns use, for single numbers, so patterns work without NumPy.
+    """
+    pi = math.pi
+
+    @staticmethod
+    def clip(value, low, high):
+        return min(high, max(low, value))
+
+    @staticmethod
+    def where(condition, a, b):
+        return a if condition else b
+
+    abs = staticmethod(abs)
+    cos = staticmethod(math.cos)
+    ceil = staticmethod(math.ceil)
+
+
+def _ring(xp, f, t):
+    # A single ring growing from the centre to the corners
+    return xp.clip(1 - xp.abs(f["radius"] - t * (MAX_RADIUS + 1)) / 0.75, 0, 1)
+
+
+def _ripple(xp, f, t):
+    # Concentric waves moving outwards
+    return ((xp.cos(2 * xp.pi * (f["radius"] / 3 - t)) + 1) / 2) ** 2
+
+
+def _spiral(xp, f, t):
+    # Two spiral arms turning anticlockwise
+    return xp.clip(1 - ((2 * (f["angle"] - f["radius"] / 8 - t)) % 1) * 3, 0, 1)
+
+
+def _radar(xp, f, t):
+    # A sweeping beam with a fading trail
+    return xp.clip(1 - ((t - f["angle"]) % 1) * 4, 0, 1)
+
+
+def _diamond(xp, f, t):
+    # The original pulse: grows from the middle 4 pixels to all but the corners, then shrinks back
+    level = xp.ceil((1 - xp.abs(2 * t - 1)) * 4)
+    return xp.where((f["square"] <= level - 0.5) & (f["diamond"] <= 5), 1.0, 0.0)
+
+
+PATTERNS = {
+    "ring": _ring,
+    "ripple": _ripple,
+    "spiral": _spiral,
+    "radar": _radar,
+    "diamond": _diamond,
+}
+DEFAULT_FRAMES = {"diamond": 8}  # Frames per cycle, where it isn't 16
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def compile_pattern(pattern, colour, frames=None):
+    """
+    Compute one cycle of a pattern. Results are cached, so treat them as read-only.
+
+    Args:
+        pattern (str): One of PATTERNS.
+        colour (tuple): (r, g, b) at full brightness, each 0-255.
+        frames (int, optional): Frames per cycle. Defaults to the pattern's own.
+
+    Returns:
+        Tuple of Frames
+
+    Raises:
+        ValueError: if pattern is unknown
+
+    Examples:
+        >>> frames = compile_pattern("diamond", (255, 0, 0))
+        >>> len(frames), sum(pixel != [0, 0, 0] for pixel in frames[0]), sum(pixel != [0, 0, 0] for pixel in frames[3])
+        (8, 4, 52)
+
+    """
+    if pattern not in PATTERNS:
+        raise ValueError("Unknown pattern: {0}. Try one of {1}".format(pattern, sorted(PATTERNS)))
+    frames = frames or DEFAULT_FRAMES.get(pattern, 16)
+    formula = PATTERNS[pattern]
+    phases = [(frame + 0.5) / frames for frame in range(frames)]  # Sample each frame in its middle
+
+    if numpy is not None:
+        fields = {name: numpy.array(values)[None, :] for name, values in FIELDS.items()}
+        intensity = formula(numpy, fields, numpy.array(phases)[:, None]) * numpy.ones((frames, WIDTH * HEIGHT))
+        pixels = numpy.floor(intensity[:, :, None] * numpy.array(colour, dtype=float) + 0.5).astype(numpy.uint8)
+        return tuple(Frame(WIDTH, HEIGHT, bytearray(frame.tobytes())) for frame in pixels)
+
+    names = list(FIELDS)
+    pixel_fields = [dict(zip(names, values)) for values in zip(*(FIELDS[name] for name in names))]
+    return tuple(Frame(WIDTH, HEIGHT, bytearray(int(formula(_ScalarMath, f, t) * value + 0.5)
+                                                for f in pixel_fields for value in colour))
+                 for t in phases)
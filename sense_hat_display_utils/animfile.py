@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+Animation files: pre-rendered frames with their durations, so an effect can be worked out once and replayed without
+rendering it again.
+
+Layout (little-endian):
+
+    header  12 bytes  magic b"SHAN", version (u8), reserved (u8 and u16), frame count (u32)
+    frames  each a type (u8) and a duration in milliseconds (u32), followed by
+            KEY_FRAME:   192 bytes of r, g, b
+            DELTA_FRAME: the number of pixels that changed since the last frame (u8), then each one's position (u8)
+                         and r, g, b
+
+Delta frames are only written when they're smaller than a key frame.
+
+Make one from any action with --export, or from an animated GIF:
+
+    python -m sense_hat_display_utils pulse --colour red --export alert.shan
+    python -m sense_hat_display_utils.animfile alert.shan --gif alert.gif
+"""
+import argparse
+import struct
+import time
+
+from sense_hat_display_utils.display import VirtualDisplay
+from sense_hat_display_utils.frame import Frame
+
+MAGIC = b"SHAN"
+VERSION = 1
+KEY_FRAME = 0
+DELTA_FRAME = 1
+_HEADER = struct.Struct("<4sBBHI")
+_FRAME = struct.Struct("<BI")
+
+
+class AnimationFile(object):
+    """
+    Reads an animation file a frame at a time.
+
+    Examples:
+        >>> import tempfile
+        >>> red, black = [[255, 0, 0]] * 64, [[0, 0, 0]] * 64
+        >>> with tempfile.NamedTemporaryFile(suffix=".shan") as f:
+        ...     write_animation(f.name, [black, red[:1] + black[1:], red], [0.1, 0.1, 0.5])
+        ...     animation = AnimationFile(f.name)
+        ...     [(sum(pixel == [255, 0, 0] for pixel in pixels), duration) for pixels, duration in animation]
+        [(0, 0.1), (1, 0.1), (64, 0.5)]
+
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The animation file.
+
+        Raises:
+            ValueError: if the file isn't an animation file this version understands
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("{0} is not an animation file".format(path))
+        magic, version, reserved, reserved_2, self.count = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{0} is not a version {1} animation file".format(path, VERSION))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """
+        Generate each frame as (Frame, seconds to show it for).
+
+        Raises:
+            ValueError: if the file is truncated or corrupt
+        """
+        current = bytearray(192)
+        with open(self.path, "rb") as f:
+            f.seek(_HEADER.size)
+            for index in range(self.count):
+                kind, duration = _FRAME.unpack(self._read(f, _FRAME.size))
+                if kind == KEY_FRAME:
+                    current[:] = self._read(f, 192)
+                elif kind == DELTA_FRAME:
+                    changes = self._read(f, self._read(f, 1)[0] * 4)
+                    for offset in range(0, len(changes), 4):
+                        position = changes[offset] * 3
+                        current[position:position + 3] = changes[offset + 1:offset + 4]
+                else:
+                    raise ValueError("{0} has an unknown frame type {1}".format(self.path, kind))
+                yield Frame(8, 8, bytearray(current)), duration / 1000
+
+    def _read(self, f, size):
+        data = f.read(size)
+        if len(data) < size:
+            raise ValueError("{0} is truncated".format(self.path))
+        return data
+
+
+def write_animation(path, frames, durations, delta=True):
+    """
+    Write an animation file.
+
+    Args:
+        path (str): File to write.
+        frames (list): Frames, or lists of 64 [r, g, b] pixels.
+        durations (list): Seconds to show each frame for. Stored to the millisecond.
+        delta (bool, optional): Store only the pixels that changed, where that's smaller. Defaults to True.
+
+    Raises:
+        ValueError: if a frame isn't 64 pixels
+    """
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, 0, len(frames)))
+        previous = None
+        for pixels, duration in zip(frames, durations):
+            data = bytes(Frame.from_pixels(pixels).buffer)
+            if len(data) != 192:
+                raise ValueError("Frames must be 64 [r, g, b] pixels")
+            changed = None
+            if delta and previous is not None:
+                changed = [i for i in range(0, 192, 3) if data[i:i + 3] != previous[i:i + 3]]
+                if 1 + len(changed) * 4 >= 192:
+                    changed = None
+            milliseconds = int(round(duration * 1000))
+            if changed is None:
+                f.write(_FRAME.pack(KEY_FRAME, milliseconds))
+                f.write(data)
+            else:
+                f.write(_FRAME.pack(DELTA_FRAME, milliseconds))
+                f.write(bytes([len(changed)]))
+                for i in changed:
+                    f.write(bytes([i // 3]) + data[i:i + 3])
+            previous = data
+
+
+def play_animation(display, path, repeat=1, show=None, clock=time.monotonic, sleep=time.sleep):
+    """
+    Play an animation file, reading frames from it as they're needed.
+
+    Frames are kept to the timeline from the start, and a frame whose time has already passed is skipped, except the
+    last.
+
+    Args:
+        display: An object with the SenseHat display methods.
+        path (str): The animation file.
+        repeat (int, optional): Number of times to play it.
+        show (callable, optional): Shows one frame. Defaults to display.set_pixels.
+        clock (callable, optional): Monotonic time source.
+        sleep (callable, optional): Sleeps for a number of seconds.
+
+    Returns:
+        Number of frames shown
+
+    Raises:
+        ValueError: if the file isn't a valid animation file
+
+    """
+    animation = AnimationFile(path)
+    show = show or display.set_pixels
+    deadline = clock()
+    shown = 0
+    for number in range(repeat):
+        last = number == repeat - 1
+        for index, (pixels, duration) in enumerate(animation):
+            start, deadline = deadline, deadline + duration
+            now = clock()
+            if now >= deadline and not (last and index == animation.count - 1):
+                continue
+            if now < start:
+                sleep(start - now)
+            show(pixels)
+            shown += 1
+    now = clock()
+    if now < deadline:  # Hold the last frame for its duration
+        sleep(deadline - now)
+    return shown
+
+
+class VirtualClock(object):
+    """
+    A clock that only moves when something sleeps, so actions can be recorded without waiting for them.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def save_recording(path, display, delta=True, apply_gamma=False, last=0.1):
+    """
+    Write what a VirtualDisplay recorded as an animation file. Frames that didn't last a millisecond are left out, and
+    repeated frames are merged.
+
+    Args:
+        path (str): File to write.
+        display (VirtualDisplay): The recording. Rotation isn't undone, so record at rotation 0.
+        delta (bool, optional): Store only the pixels that changed, where that's smaller.
+        apply_gamma (bool, optional): Bake the gamma table into the pixels, so brightness effects are kept.
+        last (float, optional): Seconds to show the last frame for.
+
+    Returns:
+        Number of frames written
+
+    Raises:
+        ValueError: if nothing was recorded
+    """
+    if not display.frames:
+        raise ValueError("No frames recorded")
+    frames = []
+    durations = []
+    for frame, duration in zip(display.frames, display.durations(last)):
+        if int(round(duration * 1000)) == 0:
+            continue
+        pixels = display.rendered(frame) if apply_gamma else frame.pixels
+        if frames and frames[-1] == pixels:
+            durations[-1] += duration
+        else:
+            frames.append(pixels)
+            durations.append(duration)
+    write_animation(path, frames, durations, delta)
+    return len(frames)
+
+
+def export_action(path, action, delta=True, apply_gamma=False, last=None, start=None, **kwargs):
+    """
+    Run a SenseHatUtility action on a virtual display, in virtual time, and save it as an animation file.
+
+    Args:
+        path (str): File to write.
+        action (str): Name of the SenseHatUtility method, eg. "pulse".
+        delta (bool, optional): Store only the pixels that changed, where that's smaller.
+        apply_gamma (bool, optional): Bake the gamma table into the pixels, so brightness effects are kept.
+        last (float, optional): Seconds to show the last frame for. Defaults to the action's speed.
+        start (optional): 64 [r, g, b] pixels on the display when the action starts. Actions that change what's
+            already there, like fade_out, need this: the virtual display starts black. Not saved as a frame itself.
+        **kwargs: Arguments for the action.
+
+    Returns:
+        Number of frames written
+
+    Raises:
+        ValueError: if the action didn't change the display
+
+    Examples:
+        >>> import tempfile
+        >>> from sense_hat_display_utils.blend import solid
+        >>> from sense_hat_display_utils.colours import Colour
+        >>> with tempfile.NamedTemporaryFile(suffix=".shan") as f:
+        ...     export_action(f.name, "pulse", colour=Colour("red"), speed=0.05)
+        ...     [round(duration, 2) for pixels, duration in AnimationFile(f.name)]
+        7
+        [0.05, 0.05, 0.05, 0.1, 0.05, 0.05, 0.05]
+        >>> with tempfile.NamedTemporaryFile(suffix=".shan") as f:
+        ...     export_action(f.name, "fade_out", start=solid([64, 0, 0]), steps=4, speed=0.05)
+        ...     [pixels[0] for pixels, duration in AnimationFile(f.name)]
+        4
+        [[48, 0, 0], [32, 0, 0], [16, 0, 0], [0, 0, 0]]
+        >>> export_action("fade.shan", "fade_out", speed=0.05)
+        Traceback (most recent call last):
+        ...
+        ValueError: fade_out didn't change the display. Give it a start frame to change
+
+    """
+    from sense_hat_display_utils.utility import SenseHatUtility
+
+    clock = VirtualClock()
+    display = VirtualDisplay(clock=clock.time)
+    shu = SenseHatUtility(autorestore=False, display=display)
+    shu._clock = clock.time
+    shu._sleep = clock.sleep
+    if start is not None:
+        display.set_pixels(start)  # At time 0, so it lasts no time and isn't saved
+    shown = len(display.frames)
+    getattr(shu, action)(**kwargs)
+    if len(display.frames) == shown:
+        raise ValueError("{0} didn't change the display. Give it a start frame to change".format(action))
+    if last is None:
+        last = kwargs.get("speed", shu.DEFAULT_SPEED)
+    return save_recording(path, display, delta, apply_gamma, last)
+
+
+def from_gif(path):
+    """
+    Read an animated GIF (or any image PIL can read). Frames that aren't 8x8 are scaled down.
+
+    Args:
+        path (str): The image.
+
+    Returns:
+        (frames, durations), ready for write_animation()
+    """
+    from PIL import Image, ImageSequence
+
+    frames = []
+    durations = []
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            duration = frame.info.get("duration", 100) / 1000
+            frame = frame.convert("RGB")
+            if frame.size != (8, 8):
+                frame = frame.resize((8, 8), Image.NEAREST)
+            frames.append(Frame.from_image(frame))
+            durations.append(duration)
+    return frames, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an animated GIF to a Sense HAT animation file")
+    parser.add_argument("output", help="Animation file to write")
+    parser.add_argument("--gif", required=True, help="Animated GIF or PNG to convert")
+    parser.add_argument("--no_delta", action="store_true", help="Store every frame in full")
+    args = parser.parse_args()
+
+    frames, durations = from_gif(args.gif)
+    write_animation(args.output, frames, durations, not args.no_delta)
+    print("Wrote {0} frames to {1}".format(len(frames), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""
+Display action benchmarks.
+
+Runs each action against an in-memory stand-in for the LED matrix with sleeping turned off, so only the work of
+rendering and pushing frames is timed, and reports:
+
+    frames/s     frames pushed per second, in the median of several timed rounds
+    relative     frames pushed per run of a fixed reference workload timed alongside the action
+    held blocks  memory blocks alive while a frame is being pushed, beyond those alive before the action started
+    peak KiB     the most memory the action had allocated at once, from tracemalloc
+
+    python -m sense_hat_display_utils.benchmarks.actions --save baseline.json
+    python -m sense_hat_display_utils.benchmarks.actions --baseline baseline.json
+
+With --baseline the run fails if any action is slower relative to the reference, or holds more blocks or memory,
+than in the baseline by more than --tolerance. The relative rate still depends on the machine's CPU and Python
+version, so save baselines on the machine they'll be compared on. The TrueType benchmarks are skipped if --ttf_font
+can't be loaded.
+"""
+import argparse
+import functools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from sense_hat_display_utils import defaults
+from sense_hat_display_utils.animation import compile_pattern
+from sense_hat_display_utils.blend import solid
+from sense_hat_display_utils.colours import Colour
+from sense_hat_display_utils.display import VirtualDisplay
+from sense_hat_display_utils.icons import ICONS
+from sense_hat_display_utils.rendercache import RenderCache
+from sense_hat_display_utils.utility import SenseHatUtility
+
+DEFAULT_ROUNDS = 5
+DEFAULT_ROUND_TIME = 0.2  # Seconds to keep repeating an action for in each round
+SLICES = 10  # Times each round switches between the action and the reference workload
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_TTF_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"  # Installed on Raspberry Pi OS
+SHORT_MESSAGE = "Hi"
+LONG_MESSAGE = "The quick brown fox jumps over the lazy dog 0123456789"
+CLOCK_TIMES = ["{0:02d}{1:02d}".format(minute // 60, minute % 60) for minute in range(0, 24 * 60, 23)]
+
+_WHITE, _BLACK, _RED = Colour("white"), Colour("black"), Colour("red")
+
+
+def _fade_out(shu):
+    shu.sh.set_pixels(solid([255, 255, 255]))
+    shu.fade_out(speed=0)
+
+
+def _clock(shu):
+    for hhmm in CLOCK_TIMES:
+        shu.sh.set_pixels(ICONS.clock(hhmm).pixels)
+
+
+def _compile_pulse(shu):
+    compile_pattern.cache_clear()
+    shu.pulse(_RED, speed=0)
+
+
+# Name, font ("pil", "ttf" or None for actions that don't draw text), action taking a SenseHatUtility, and font and
+# font_size for actions that draw text
+BENCHMARKS = [
+    ("print", "pil", lambda shu, **font: shu.print(SHORT_MESSAGE, _WHITE, _BLACK, **font)),
+    ("scroll_short_pil", "pil", lambda shu, **font: shu._scroll(SHORT_MESSAGE, _WHITE, _BLACK, speed=0, **font)),
+    ("scroll_long_pil", "pil", lambda shu, **font: shu._scroll(LONG_MESSAGE, _WHITE, _BLACK, speed=0, **font)),
+    ("scroll_short_ttf", "ttf", lambda shu, **font: shu._scroll(SHORT_MESSAGE, _WHITE, _BLACK, speed=0, **font)),
+    ("scroll_long_ttf", "ttf", lambda shu, **font: shu._scroll(LONG_MESSAGE, _WHITE, _BLACK, speed=0, **font)),
+    ("pulse_compile", None, _compile_pulse),
+    ("pulse", None, lambda shu: shu.pulse(_RED, speed=0)),
+    ("fade_out", None, _fade_out),
+    ("clock", None, _clock),
+    ("show_icon", None, lambda shu: shu.show_icon("estelada")),
+]
+
+
+class _BenchmarkDisplay(VirtualDisplay):
+    # Counts frames instead of recording them, and optionally samples how many memory blocks are held at each one
+    def __init__(self):
+        super().__init__(record=False)
+        self.pushed = 0
+        self.baseline_blocks = None
+        self.held_blocks = []
+
+    def set_pixels(self, pixel_list):
+        if self.baseline_blocks is not None:
+            self.held_blocks.append(sys.getallocatedblocks() - self.baseline_blocks)
+        super().set_pixels(pixel_list)
+        self.pushed += 1
+
+
+def _no_sleep(seconds):
+    pass
+
+
+def _reference():
+    # A fixed amount of pure Python work, about as much as building a frame, to time how fast the machine is right now
+    pixels = [[index & 255, (index * 7) & 255, (index * 13) & 255] for index in range(64)]
+    return sorted(pixels, key=lambda pixel: pixel[1])
+
+
+def _repeat(function, seconds):
+    # Call function until seconds have passed, at least once. Returns (calls, seconds taken)
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while not calls or elapsed < seconds:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def measure(action, font=None, rounds=DEFAULT_ROUNDS, round_time=DEFAULT_ROUND_TIME):
+    """
+    Benchmark one action.
+
+    Each round alternates between repeating the action and repeating a fixed reference workload, so both are timed
+    while the machine runs at the same speed, and the frame rate is also given relative to the reference's rate. A
+    shared or throttled CPU changes frames/s a lot from one run to the next, but barely changes the relative rate.
+
+    Args:
+        action (callable): Takes a SenseHatUtility and shows something on it.
+        font (tuple, optional): (font file, size) to load first, and pass to the action as font and font_size.
+        rounds (int, optional): Timed rounds to run. Results are the median round's.
+        round_time (float, optional): Seconds to keep repeating the action for in each round, and as long again
+            for the reference. The action runs at least once per slice of a round.
+
+    Returns:
+        dict of fps, relative_fps (frames pushed per run of the reference), held_blocks and peak_kib
+
+    Raises:
+        ValueError: if the font can't be loaded
+
+    Examples:
+        >>> result = measure(lambda shu: shu.show_icon("estelada"), rounds=2, round_time=0)
+        >>> sorted(result), result["fps"] > 0, result["relative_fps"] > 0
+        (['fps', 'held_blocks', 'peak_kib', 'relative_fps'], True, True)
+        >>> measure(lambda shu: None, font=("missing.ttf", 8))
+        Traceback (most recent call last):
+        ...
+        ValueError: Can't load font missing.ttf
+
+    """
+    display = _BenchmarkDisplay()
+    shu = SenseHatUtility(autorestore=False, display=display)
+    shu._sleep = _no_sleep
+    shu.render_cache = RenderCache(max_strips=0)  # Render every time, as if each message were new
+    if font is not None:
+        shu._set_font(*font)
+        if shu._font_key[0] == "<default>":  # _set_font() fell back to PIL's default font
+            raise ValueError("Can't load font {0}".format(font[0]))
+        action = functools.partial(action, font=font[0], font_size=font[1])
+    action(shu)  # Warm up the glyph atlas and anything else that's filled on first use
+
+    round_fps = []
+    round_relative_fps = []
+    for round_number in range(rounds):
+        frames = action_time = references = reference_time = 0
+        for slice_number in range(SLICES):
+            calls, elapsed = _repeat(_reference, round_time / SLICES)
+            references += calls
+            reference_time += elapsed
+            pushed = display.pushed
+            calls, elapsed = _repeat(lambda: action(shu), round_time / SLICES)
+            frames += display.pushed - pushed
+            action_time += elapsed
+        round_fps.append(frames / action_time)
+        round_relative_fps.append(round_fps[-1] * reference_time / references)
+    fps = statistics.median(round_fps)
+    relative_fps = statistics.median(round_relative_fps)
+
+    display.baseline_blocks = sys.getallocatedblocks()
+    action(shu)
+    held_blocks = statistics.median(display.held_blocks) if display.held_blocks else 0
+    display.baseline_blocks = None
+
+    tracemalloc.start()
+    try:
+        action(shu)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"fps": fps, "relative_fps": relative_fps, "held_blocks": held_blocks, "peak_kib": peak / 1024}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Find regressions against a baseline. Actions and results missing from either are skipped.
+
+    Args:
+        results (dict): Action name: measure() result.
+        baseline (dict): The same, from an earlier run.
+        tolerance (float, optional): How much worse than the baseline is allowed, eg. 0.2 for 20%.
+
+    Returns:
+        List of descriptions of regressions
+
+    Examples:
+        >>> compare({"pulse": {"fps": 700, "relative_fps": 0.14, "held_blocks": 2, "peak_kib": 10}},
+        ...         {"pulse": {"fps": 1000, "relative_fps": 0.2, "held_blocks": 2, "peak_kib": 9}})
+        ['pulse: 0.140 frames per reference run, baseline 0.200']
+        >>> compare({"clock": {"fps": 500, "relative_fps": 0.2, "held_blocks": 40, "peak_kib": 9}},
+        ...         {"clock": {"fps": 1000, "relative_fps": 0.2, "held_blocks": 20, "peak_kib": 9}})
+        ['clock: 40 blocks held, baseline 20']
+
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        # Raw frames/s is left out: it follows how busy the machine is
+        if "relative_fps" in expected and result["relative_fps"] < expected["relative_fps"] * (1 - tolerance):
+            regressions.append("{0}: {1:.3f} frames per reference run, baseline {2:.3f}".format(
+                name, result["relative_fps"], expected["relative_fps"]))
+        # A block or two either way is noise
+        if "held_blocks" in expected and result["held_blocks"] > expected["held_blocks"] * (1 + tolerance) + 1:
+            regressions.append("{0}: {1:.0f} blocks held, baseline {2:.0f}".format(
+                name, result["held_blocks"], expected["held_blocks"]))
+        if "peak_kib" in expected and result["peak_kib"] > expected["peak_kib"] * (1 + tolerance) + 1:
+            regressions.append("{0}: {1:.1f} KiB peak, baseline {2:.1f}".format(
+                name, result["peak_kib"], expected["peak_kib"]))
+    return regressions
+
+
+def report(results, out=sys.stdout):
+    """
+    Print measure() results as a table.
+    """
+    out.write("{0:<20} {1:>12} {2:>9} {3:>12} {4:>10}\n".format("action", "frames/s", "relative", "held blocks",
+                                                                 "peak KiB"))
+    for name, result in results.items():
+        out.write("{0:<20} {1:>12.0f} {2:>9.3f} {3:>12.0f} {4:>10.1f}\n".format(
+            name, result["fps"], result["relative_fps"], result["held_blocks"], result["peak_kib"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sense_hat_display_utils display actions")
+    parser.add_argument("-n", "--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help="Timed rounds to run each action for, keeping the median")
+    parser.add_argument("--round_time", type=float, default=DEFAULT_ROUND_TIME,
+                        help="Seconds to keep repeating each action for in a round")
+    parser.add_argument("--only", action="append", choices=[name for name, font, action in BENCHMARKS],
+                        help="Only run this benchmark (can be repeated)")
+    parser.add_argument("--pil_font", default=defaults.DEFAULT_FONT, help="PIL bitmap font for the *_pil benchmarks")
+    parser.add_argument("--ttf_font", default=DEFAULT_TTF_FONT, help="TrueType font for the *_ttf benchmarks")
+    parser.add_argument("--font_size", type=int, default=defaults.DEFAULT_FONT_SIZE,
+                        help="Point size for the TrueType font")
+    parser.add_argument("--save", help="Save the results to this file, as a baseline for later runs")
+    parser.add_argument("--baseline", help="Fail if the results are worse than the ones saved in this file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="How much worse than the baseline each result can be, eg. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    fonts = {"pil": (args.pil_font, 0), "ttf": (args.ttf_font, args.font_size)}
+    results = {}
+    for name, font, action in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        try:
+            results[name] = measure(action, fonts.get(font), args.rounds, args.round_time)
+        except ValueError as e:
+            sys.stderr.write("Skipping {0}: {1}\n".format(name, e))
+    report(results)
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.stderr.write("Regressions against {0}:\n{1}\n".format(args.baseline, "\n".join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
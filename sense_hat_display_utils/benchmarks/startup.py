@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Startup-time benchmark.
+
+Imports each target module in a fresh interpreter with ``python -X importtime``, several times over,
+and reports the median self and cumulative import time of every module that was loaded, plus the
+median wall-clock time of the whole interpreter run.
+
+    python -m sense_hat_display_utils.benchmarks.startup --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_TARGETS = ["sense_hat_display_utils.__main__", "sense_hat_display_utils.utility"]
+DEFAULT_RUNS = 5
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of ``python -X importtime``.
+
+    Args:
+        stderr (str): What the interpreter wrote to stderr.
+
+    Returns:
+        dict of module name: (self microseconds, cumulative microseconds)
+
+    Examples:
+        >>> parse_importtime("import time: self [us] | cumulative | imported package\\n"
+        ...                  "import time:       120 |        120 |   _io\\n"
+        ...                  "import time:        80 |        200 | io\\n")
+        {'_io': (120, 120), 'io': (80, 200)}
+
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure(target, runs=DEFAULT_RUNS, python=sys.executable):
+    """
+    Import target in runs fresh interpreters.
+
+    Args:
+        target (str): Module to import.
+        runs (int, optional): Number of interpreters to start.
+        python (str, optional): The interpreter to benchmark.
+
+    Returns:
+        (list of wall-clock seconds per run, list of parse_importtime() dicts per run)
+
+    Raises:
+        RuntimeError: if target can't be imported
+
+    """
+    walls, timings = [], []
+    for run in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([python, "-X", "importtime", "-c", "import {0}".format(target)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        walls.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError("Can't import {0}: {1}".format(target, result.stderr.strip().splitlines()[-1]))
+        timings.append(parse_importtime(result.stderr))
+    return walls, timings
+
+
+def report(target, walls, timings, top=20, out=sys.stdout):
+    """
+    Print the median timings of a measure() run, slowest cumulative import first.
+    """
+    modules = set().union(*timings)
+    medians = {}
+    for module in modules:
+        samples = [run[module] for run in timings if module in run]
+        medians[module] = (statistics.median(s[0] for s in samples), statistics.median(s[1] for s in samples))
+
+    out.write("{0}: {1:.1f} ms wall clock (median of {2}), {3} modules imported\n".format(
+        target, statistics.median(walls) * 1000, len(walls), len(modules)))
+    out.write("{0:>10} {1:>12}  {2}\n".format("self ms", "cumulative", "module"))
+    for module, (self_us, cumulative_us) in sorted(medians.items(), key=lambda item: -item[1][1])[:top]:
+        out.write("{0:>10.2f} {1:>12.2f}  {2}\n".format(self_us / 1000, cumulative_us / 1000, module))
+    out.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of sense_hat_display_utils modules")
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="Modules to import")
+    parser.add_argument("-n", "--runs", type=int, default=DEFAULT_RUNS, help="Fresh interpreters per target")
+    parser.add_argument("-t", "--top", type=int, default=20, help="Number of modules to list per target")
+    args = parser.parse_args()
+
+    failed = False
+    for target in args.targets:
+        try:
+            walls, timings = measure(target, args.runs)
+        except RuntimeError as ex:
+            sys.stderr.write("{0}\n\n".format(ex))
+            failed = True
+            continue
+        report(target, walls, timings, args.top)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Whole-sequence blending between frames: fades to black, fades to a colour and cross-fades.
+
+Every frame of a fade is computed up front in one go, using NumPy if it's installed and the frames' flat buffers of
+channel values if not, so showing the fade is just pushing frames.
+"""
+try:
+    import numpy
+except ImportError:  # NumPy is optional, it just makes long fades cheaper
+    numpy = None
+
+from sense_hat_display_utils.frame import Frame, default_shape
+
+
+def _linear(t):
+    return t
+
+
+def _ease_in(t):
+    return t * t
+
+
+def _ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+def _ease_in_out(t):
+    return t * t * (3 - 2 * t)
+
+
+EASINGS = {
+    "linear": _linear,
+    "ease_in": _ease_in,  # Starts slowly
+    "ease_out": _ease_out,  # Ends slowly
+    "ease_in_out": _ease_in_out,  # Starts and ends slowly
+}
+
+
+def solid(colour, count=64):
+    """
+    A frame of a single colour.
+
+    Args:
+        colour: [r, g, b] or (r, g, b), each 0-255.
+        count (int, optional): Number of pixels.
+
+    Returns:
+        Frame of count pixels
+    """
+    return Frame.solid(colour, *default_shape(count))
+
+
+def fade_sequence(start, end, steps, easing="linear"):
+    """
+    Compute every frame of a blend from one frame to another.
+
+    Args:
+        start: The Frame to blend from, or a list of [r, g, b] pixels.
+        end: The frame to blend to. Must be the same size as start.
+        steps (int): Number of frames to produce. The last one is end.
+        easing (str, optional): One of EASINGS. Defaults to "linear".
+
+    Returns:
+        List of steps Frames, the same shape as start
+
+    Raises:
+        ValueError: if the frames are different sizes, or easing is unknown
+
+    Examples:
+        >>> [frame.tolist() for frame in fade_sequence([[200, 100, 0]], [[0, 0, 0]], 4)]
+        [[[150, 75, 0]], [[100, 50, 0]], [[50, 25, 0]], [[0, 0, 0]]]
+        >>> [frame.tolist() for frame in fade_sequence([[0, 0, 0]], [[100, 100, 100]], 2, "ease_in")]
+        [[[25, 25, 25]], [[100, 100, 100]]]
+
+    """
+    if len(start) != len(end):
+        raise ValueError("Can't blend frames of different sizes")
+    if easing not in EASINGS:
+        raise ValueError("Unknown easing: {0}. Try one of {1}".format(easing, sorted(EASINGS)))
+    if steps < 1:
+        return []
+    ease = EASINGS[easing]
+    weights = [ease(step / steps) for step in range(1, steps + 1)]
+    start = Frame.from_pixels(start)
+    end = Frame.from_pixels(end)
+    width, height = start.width, start.height
+
+    if numpy is not None:
+        a = numpy.frombuffer(start.buffer, dtype=numpy.uint8).astype(numpy.float64)
+        difference = numpy.frombuffer(end.buffer, dtype=numpy.uint8) - a
+        sequence = a + numpy.array(weights, dtype=numpy.float64)[:, None] * difference
+        # Round halves up like the pure Python version, rather than NumPy's round half to even
+        sequence = numpy.floor(sequence + 0.5).clip(0, 255).astype(numpy.uint8)
+        return [Frame(width, height, bytearray(frame.tobytes())) for frame in sequence]
+
+    a = start.buffer
+    difference = [b - value for value, b in zip(a, end.buffer)]
+    return [Frame(width, height, bytearray(int(value + d * weight + 0.5) for value, d in zip(a, difference)))
+            for weight in weights]
@@ -0,0 +1,195 @@
+"""
+A display made of several 8x8 panels, eg. a row of Sense HATs on different Pis making up a status wall.
+
+Frames are rendered once at the size of the whole wall, then cut into tiles and pushed to every panel at the same time
+through a thread pool. Each frame is on every panel before the next one is due, so the panels stay in step.
+"""
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+from sense_hat_display_utils.defaults import DEFAULT_SOCKET
+from sense_hat_display_utils.display import DisplayBackend, get_display
+
+TILE_WIDTH = 8
+TILE_HEIGHT = 8
+
+
+class TiledCanvas(DisplayBackend):
+    """
+    A display width x height pixels, made of 8x8 tiles each shown on its own display backend.
+
+    Frames of a single tile's size (eg. icons and pulses) are shown on every tile.
+
+    Examples:
+        >>> from sense_hat_display_utils.display import VirtualDisplay
+        >>> left, right = VirtualDisplay(), VirtualDisplay()
+        >>> canvas = TiledCanvas([left, right], columns=2)
+        >>> canvas.width, canvas.height
+        (16, 8)
+        >>> canvas.set_pixels([[255, 0, 0] if x == 8 else [0, 0, 0] for y in range(8) for x in range(16)])
+        >>> left.get_pixels()[0], right.get_pixels()[0]
+        ([0, 0, 0], [255, 0, 0])
+        >>> canvas.close()
+
+    """
+
+    def __init__(self, tiles, columns=None, max_workers=None):
+        """
+        Args:
+            tiles (list): Display backends, one per tile, left to right then top to bottom.
+            columns (int, optional): Tiles per row. Defaults to all of them in one row.
+            max_workers (int, optional): Threads pushing tiles. Defaults to one per tile.
+
+        Raises:
+            ValueError: if the tiles don't fill whole rows
+        """
+        super().__init__()
+        columns = columns or len(tiles)
+        if not tiles or len(tiles) % columns:
+            raise ValueError("{0} tiles don't make whole rows of {1}".format(len(tiles), columns))
+        self.tiles = list(tiles)
+        self.columns = columns
+        self.rows = len(tiles) // columns
+        self.width = columns * TILE_WIDTH
+        self.height = self.rows * TILE_HEIGHT
+        self._pixels = [[0, 0, 0] for i in range(self.width * self.height)]
+        # Canvas pixel positions making up each tile, in the tile's own row-major order
+        self._tile_positions = []
+        for index in range(len(tiles)):
+            left = (index % columns) * TILE_WIDTH
+            top = (index // columns) * TILE_HEIGHT
+            self._tile_positions.append([(top + y) * self.width + left + x
+                                         for y in range(TILE_HEIGHT) for x in range(TILE_WIDTH)])
+        self._executor = ThreadPoolExecutor(max_workers or len(tiles)) if len(tiles) > 1 else None
+
+    def close(self):
+        """
+        Stop the push threads, and close any tiles that can be closed.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for tile in self.tiles:
+            if hasattr(tile, "close"):
+                tile.close()
+
+    def set_pixels(self, pixel_list):
+        if len(pixel_list) == TILE_WIDTH * TILE_HEIGHT and len(self._pixels) != len(pixel_list):
+            # A single tile's frame: repeat it across the canvas
+            tile_pixels = pixel_list
+            pixel_list = [None] * len(self._pixels)
+            for positions in self._tile_positions:
+                for position, pixel in zip(positions, tile_pixels):
+                    pixel_list[position] = pixel
+        elif len(pixel_list) != len(self._pixels):
+            raise ValueError("Pixel lists must have {0} or 64 elements".format(len(self._pixels)))
+        self._pixels = [list(pixel) for pixel in pixel_list]
+        self._each_tile(lambda tile, positions: tile.set_pixels([pixel_list[p] for p in positions]))
+
+    def get_pixels(self):
+        return [list(pixel) for pixel in self._pixels]
+
+    def _rotate(self, r):
+        # Rotate each panel in place, eg. for Pis mounted upside down
+        self._each_tile(lambda tile, positions: tile.set_rotation(r, False))
+
+    def _apply_gamma(self, buffer):
+        def apply(tile, positions):
+            tile.gamma = buffer
+
+        self._each_tile(apply)
+
+    def _each_tile(self, function):
+        # Run function(tile, canvas positions) for every tile at once, returning when they've all finished
+        futures = None
+        if self._executor is not None:
+            try:
+                futures = [self._executor.submit(function, tile, positions)
+                           for tile, positions in zip(self.tiles, self._tile_positions)]
+            except RuntimeError:  # The interpreter is shutting down, eg. SenseHatUtility.__del__ restoring the display
+                futures = None
+        if futures is None:  # A single tile, or closed
+            for tile, positions in zip(self.tiles, self._tile_positions):
+                function(tile, positions)
+            return
+        for future in futures:
+            future.result()  # Re-raises anything a tile raised
+
+
+class RemoteDisplay(DisplayBackend):
+    """
+    A display on another process's display server (see server.py), eg. one forwarded from another Pi with
+    ssh -L /tmp/pi2.sock:/tmp/sense-hat-display-utils.sock pi2
+
+    Frames are sent over one connection that's kept open, and each set_pixels() returns once the frame is shown.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET):
+        """
+        Args:
+            path (str, optional): Filesystem path of the server's socket.
+        """
+        super().__init__()
+        self.path = path
+        self._pixels = [[0, 0, 0] for i in range(64)]
+        self._socket = None
+        self._stream = None
+
+    def close(self):
+        if self._socket is not None:
+            self._stream.close()
+            self._socket.close()
+            self._socket = self._stream = None
+
+    def _request(self, action, **kwargs):
+        from sense_hat_display_utils.server import DisplayServerError
+
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(self.path)
+            self._stream = self._socket.makefile("rwb")
+        self._stream.write(json.dumps({"action": action, "args": kwargs}).encode("utf-8") + b"\n")
+        self._stream.flush()
+        response = self._stream.readline()
+        if not response:
+            self.close()
+            raise DisplayServerError("No response from server")
+        response = json.loads(response.decode("utf-8"))
+        if not response.get("ok"):
+            raise DisplayServerError(response.get("error"))
+
+    def set_pixels(self, pixel_list):
+        if len(pixel_list) != 64:
+            raise ValueError("Pixel lists must have 64 elements")
+        self._pixels = [list(pixel) for pixel in pixel_list]
+        self._request("show_pixels", pixels=self._pixels)
+
+    def get_pixels(self):
+        return [list(pixel) for pixel in self._pixels]
+
+    def _rotate(self, r):
+        pass  # The server's own --rotation applies
+
+
+def get_tile(spec):
+    """
+    Create a tile's display backend from a description: "sense_hat", "virtual", "framebuffer" or
+    "framebuffer:/dev/fbN", or "remote:/path/to/server.sock".
+
+    Raises:
+        ValueError: if the description isn't recognised
+
+    Examples:
+        >>> get_tile("remote:/tmp/pi2.sock").path
+        '/tmp/pi2.sock'
+
+    """
+    name, separator, argument = spec.partition(":")
+    if name == "remote":
+        return RemoteDisplay(argument or DEFAULT_SOCKET)
+    if name == "framebuffer":
+        return get_display(name, argument or None)
+    if separator:
+        raise ValueError("Unknown tile: {0}".format(spec))
+    return get_display(name)
@@ -0,0 +1,214 @@
+"""
+Colours, parsed once into 0-255 integers and RGB565.
+
+Colour accepts the same names and "#rrggbb" / "#rgb" notation as the colour library, plus "rgb(r, g, b)", and
+instances are interned: asking for the same colour again returns the same object, so nothing is parsed or converted
+per frame. The colour library isn't needed, but if it's installed anything else it understands is accepted too.
+"""
+import functools
+import re
+
+CACHE_SIZE = 1024  # Parsed colour strings to remember
+
+# The web colour names the colour library knows, as 0xrrggbb
+NAMES = {
+    "aliceblue": 0xf0f8ff, "antiquewhite": 0xfaebd7, "aqua": 0x00ffff, "aquamarine": 0x7fffd4, "azure": 0xf0ffff,
+    "beige": 0xf5f5dc, "bisque": 0xffe4c4, "black": 0x000000, "blanchedalmond": 0xffebcd, "blue": 0x0000ff,
+    "blueviolet": 0x8a2be2, "brown": 0xa52a2a, "burlywood": 0xdeb887, "cadetblue": 0x5f9ea0, "chartreuse": 0x7fff00,
+    "chocolate": 0xd2691e, "coral": 0xff7f50, "cornflowerblue": 0x6495ed, "cornsilk": 0xfff8dc, "crimson": 0xdc143c,
+    "cyan": 0x00ffff, "darkblue": 0x00008b, "darkcyan": 0x008b8b, "darkgoldenrod": 0xb8860b, "darkgray": 0xa9a9a9,
+    "darkgreen": 0x006400, "darkgrey": 0xa9a9a9, "darkkhaki": 0xbdb76b, "darkmagenta": 0x8b008b,
+    "darkolivegreen": 0x556b2f, "darkorange": 0xff8c00, "darkorchid": 0x9932cc, "darkred": 0x8b0000,
+    "darksalmon": 0xe9967a, "darkseagreen": 0x8fbc8f, "darkslateblue": 0x483d8b, "darkslategray": 0x2f4f4f,
+    "darkslategrey": 0x2f4f4f, "darkturquoise": 0x00ced1, "darkviolet": 0x9400d3, "deeppink": 0xff1493,
+    "deepskyblue": 0x00bfff, "dimgray": 0x696969, "dimgrey": 0x696969, "dodgerblue": 0x1e90ff, "firebrick": 0xb22222,
+    "floralwhite": 0xfffaf0, "forestgreen": 0x228b22, "fuchsia": 0xff00ff, "gainsboro": 0xdcdcdc,
+    "ghostwhite": 0xf8f8ff, "gold": 0xffd700, "goldenrod": 0xdaa520, "gray": 0x808080, "green": 0x008000,
+    "greenyellow": 0xadff2f, "grey": 0x808080, "honeydew": 0xf0fff0, "hotpink": 0xff69b4, "indianred": 0xcd5c5c,
+    "indigo": 0x4b0082, "ivory": 0xfffff0, "khaki": 0xf0e68c, "lavender": 0xe6e6fa, "lavenderblush": 0xfff0f5,
+    "lawngreen": 0x7cfc00, "lemonchiffon": 0xfffacd, "lightblue": 0xadd8e6, "lightcoral": 0xf08080,
+    "lightcyan": 0xe0ffff, "lightgoldenrod": 0xeedd82, "lightgoldenrodyellow": 0xfafad2, "lightgray": 0xd3d3d3,
+    "lightgreen": 0x90ee90, "lightgrey": 0xd3d3d3, "lightpink": 0xffb6c1, "lightsalmon": 0xffa07a,
+    "lightseagreen": 0x20b2aa, "lightskyblue": 0x87cefa, "lightslateblue": 0x8470ff, "lightslategray": 0x778899,
+    "lightslategrey": 0x778899, "lightsteelblue": 0xb0c4de, "lightyellow": 0xffffe0, "lime": 0x00ff00,
+    "limegreen": 0x32cd32, "linen": 0xfaf0e6, "magenta": 0xff00ff, "maroon": 0x800000, "mediumaquamarine": 0x66cdaa,
+    "mediumblue": 0x0000cd, "mediumorchid": 0xba55d3, "mediumpurple": 0x9370db, "mediumseagreen": 0x3cb371,
+    "mediumslateblue": 0x7b68ee, "mediumspringgreen": 0x00fa9a, "mediumturquoise": 0x48d1cc,
+    "mediumvioletred": 0xc71585, "midnightblue": 0x191970, "mintcream": 0xf5fffa, "mistyrose": 0xffe4e1,
+    "moccasin": 0xffe4b5, "navajowhite": 0xffdead, "navy": 0x000080, "navyblue": 0x000080, "oldlace": 0xfdf5e6,
+    "olive": 0x808000, "olivedrab": 0x6b8e23, "orange": 0xffa500, "orangered": 0xff4500, "orchid": 0xda70d6,
+    "palegoldenrod": 0xeee8aa, "palegreen": 0x98fb98, "paleturquoise": 0xafeeee, "palevioletred": 0xdb7093,
+    "papayawhip": 0xffefd5, "peachpuff": 0xffdab9, "peru": 0xcd853f, "pink": 0xffc0cb, "plum": 0xdda0dd,
+    "powderblue": 0xb0e0e6, "purple": 0x800080, "red": 0xff0000, "rosybrown": 0xbc8f8f, "royalblue": 0x4169e1,
+    "saddlebrown": 0x8b4513, "salmon": 0xfa8072, "sandybrown": 0xf4a460, "seagreen": 0x2e8b57, "seashell": 0xfff5ee,
+    "sienna": 0xa0522d, "silver": 0xc0c0c0, "skyblue": 0x87ceeb, "slateblue": 0x6a5acd, "slategray": 0x708090,
+    "slategrey": 0x708090, "snow": 0xfffafa, "springgreen": 0x00ff7f, "steelblue": 0x4682b4, "tan": 0xd2b48c,
+    "thistle": 0xd8bfd8, "tomato": 0xff6347, "turquoise": 0x40e0d0, "violet": 0xee82ee, "violetred": 0xd02090,
+    "wheat": 0xf5deb3, "white": 0xffffff, "whitesmoke": 0xf5f5f5, "yellow": 0xffff00, "yellowgreen": 0x9acd32
+
+}
+_RGB_FUNCTION = re.compile(r"^rgb\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\)$")
+_HEX = re.compile(r"^#([0-9a-f]{3}|[0-9a-f]{6})$")
+_RGB_NAMES = {}  # (r, g, b): first name with that value, for str()
+for _name, _value in sorted(NAMES.items()):
+    _RGB_NAMES.setdefault(((_value >> 16) & 255, (_value >> 8) & 255, _value & 255), _name)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_colour(value):
+    """
+    Parse a colour name, "#rrggbb", "#rgb" or "rgb(r, g, b)".
+
+    Args:
+        value (str): The colour. Case and surrounding spaces don't matter.
+
+    Returns:
+        (r, g, b) tuple, each 0-255
+
+    Raises:
+        ValueError: if the colour isn't recognised
+
+    Examples:
+        >>> parse_colour("Orange"), parse_colour("#0f8"), parse_colour("rgb(1, 2, 3)")
+        ((255, 165, 0), (0, 255, 136), (1, 2, 3))
+
+    """
+    text = value.strip().lower()
+    if text in NAMES:
+        number = NAMES[text]
+        return (number >> 16) & 255, (number >> 8) & 255, number & 255
+    match = _HEX.match(text)
+    if match:
+        digits = match.group(1)
+        if len(digits) == 3:
+            digits = "".join(digit * 2 for digit in digits)
+        return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+    match = _RGB_FUNCTION.match(text)
+    if match and all(int(channel) <= 255 for channel in match.groups()):
+        return tuple(int(channel) for channel in match.groups())
+    try:
+        from colour import Color  # Optional: it understands a few more notations
+    except ImportError:
+        raise ValueError("Unknown colour: {0}".format(value))
+    try:
+        return _from_floats(Color(value).rgb)
+    except (AttributeError, ValueError):
+        raise ValueError("Unknown colour: {0}".format(value))
+
+
+def _from_floats(rgb):
+    return tuple(int(round(min(1.0, max(0.0, channel)) * 255)) for channel in rgb)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _intern(rgb):
+    colour = object.__new__(Colour)
+    colour.rgb_int = rgb
+    colour.rgb565 = ((rgb[0] >> 3) << 11) | ((rgb[1] >> 2) << 5) | (rgb[2] >> 3)
+    return colour
+
+
+class Colour(object):
+    """
+    An immutable colour.
+
+    Examples:
+        >>> Colour("red") is Colour("#FF0000")
+        True
+        >>> Colour("lime").get_rgb_int(), Colour("white").rgb565, Colour("red").hex_l
+        ((0, 255, 0), 65535, '#ff0000')
+        >>> Colour((0, 0, 255)), str(Colour("#00f"))
+        (<Colour #0000ff>, 'blue')
+
+    """
+    __slots__ = ("rgb_int", "rgb565")
+
+    def __new__(cls, color=None, rgb=None):
+        """
+        Args:
+            color (optional): A name, "#rrggbb", "#rgb" or "rgb(r, g, b)" string, an (r, g, b) sequence of 0-255
+                integers, a Colour, or a colour.Color. Defaults to black.
+            rgb (tuple, optional): (r, g, b) as 0-1 floats, like colour.Color(rgb=...). Used instead of color.
+
+        Raises:
+            ValueError: if the colour isn't recognised
+        """
+        if isinstance(color, Colour):
+            return color
+        if rgb is not None:
+            return _intern(_from_floats(rgb))
+        if color is None:
+            return _intern((0, 0, 0))
+        if isinstance(color, str):
+            return _intern(parse_colour(color))
+        if hasattr(color, "rgb"):  # A colour.Color
+            return _intern(_from_floats(color.rgb))
+        channels = tuple(int(channel) for channel in color)
+        if len(channels) != 3 or not all(0 <= channel <= 255 for channel in channels):
+            raise ValueError("Colours must be 3 values between 0 and 255")
+        return _intern(channels)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "rgb565"):  # Set once by _intern()
+            raise AttributeError("Colours can't be changed")
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        """
+        Pickle a colour as its channels, so unpickling goes through __new__ and gets the interned colour.
+
+        Examples:
+            >>> import copy, pickle
+            >>> red = Colour("red")
+            >>> copy.copy(red) is red, copy.deepcopy([red])[0] is red, pickle.loads(pickle.dumps(red)) is red
+            (True, True, True)
+
+        """
+        return Colour, (self.rgb_int,)
+
+    def __copy__(self):
+        return self  # Immutable, so a copy may as well be the same colour
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def get_rgb_int(self):
+        """
+        Returns: The colour in (0-255) range for PIL compatibility
+
+        """
+        return self.rgb_int
+
+    def get_rgb(self):
+        """
+        Returns: The colour in (0-1) range, like colour.Color
+
+        """
+        return tuple(channel / 255 for channel in self.rgb_int)
+
+    @property
+    def rgb(self):
+        return self.get_rgb()
+
+    @property
+    def hex_l(self):
+        return "#{0:02x}{1:02x}{2:02x}".format(*self.rgb_int)
+
+    @property
+    def hex(self):
+        long = self.hex_l
+        if long[1] == long[2] and long[3] == long[4] and long[5] == long[6]:
+            return "#" + long[1] + long[3] + long[5]
+        return long
+
+    def __eq__(self, other):
+        return isinstance(other, Colour) and self.rgb_int == other.rgb_int
+
+    def __hash__(self):
+        return hash(self.rgb_int)
+
+    def __repr__(self):
+        return "<Colour {0}>".format(self.hex_l)
+
+    def __str__(self):
+        return _RGB_NAMES.get(self.rgb_int, self.hex_l)
@@ -0,0 +1,16 @@
+# Default settings, kept free of imports so the command line can use them without loading PIL or sense_hat
+
+DEFAULT_SPEED = 0.1  # Seconds per frame: frame i is due at start + i * speed, and late frames are dropped to keep up
+DEFAULT_FONT = "fonts/miniwi-8.pil"  # https://github.com/josuah/miniwi
+DEFAULT_FONT_SIZE = 6  # Bigger font, bigger size. AKA letter 'width' in the scroll function
+DEFAULT_X_OFFSET = 0  # "Don't touch this" - MC Hammer
+DEFAULT_Y_OFFSET = 0  # Some TrueType fonts have a lot of padding (to make room for accents?) and setting this to +/- 1 can make them fit better
+DEFAULT_FOREGROUND = "white"  # Colour names, "#rrggbb" or "rgb(r, g, b)"
+DEFAULT_BACKGROUND = "black"
+DEFAULT_SOCKET = "/tmp/sense-hat-display-utils.sock"  # Where the display server listens
+
+# Actions that finish on their own, which playlists and the display server can run. live_clock runs until it's stopped,
+# so it would hold up the rest of a playlist, or the server's queue, forever
+FINITE_ACTIONS = ("print", "scroll", "show_icon", "show_clock", "pulse", "animate", "fade_out", "fade_to", "crossfade",
+                  "gamma_fade_out", "gamma_fade_in", "gamma_pulse", "dim", "play", "show_pixels")
+COLOUR_ARGS = ("colour", "background_colour")  # Action arguments that are colours
@@ -0,0 +1,296 @@
+import collections
+import json
+import time
+
+DISPLAYS = ("sense_hat", "framebuffer", "virtual")
+
+# The Sense HAT driver's gamma tables, mapping 5-bit colour values to LED brightness
+DEFAULT_GAMMA = [0, 0, 0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 15, 17, 18, 20, 21, 23, 25, 27, 29,
+                 31]
+LOW_LIGHT_GAMMA = [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 10, 10]
+
+# Physical position of each display pixel for each rotation, the same as the sense_hat library's pix_map
+PIXEL_MAPS = {
+    0: [row * 8 + col for row in range(8) for col in range(8)],
+    90: [col * 8 + 7 - row for row in range(8) for col in range(8)],
+    180: [(7 - row) * 8 + 7 - col for row in range(8) for col in range(8)],
+    270: [(7 - col) * 8 + row for row in range(8) for col in range(8)],
+}
+
+
+def get_display(name="sense_hat", fb_device=None):
+    """
+    Create a display backend by name.
+
+    Args:
+        name (str, optional): One of DISPLAYS.
+        fb_device (str, optional): Framebuffer device (or stand-in file) for the "framebuffer" display.
+
+    Returns:
+        An object with the SenseHat display methods
+
+    Raises:
+        ValueError: if name isn't one of DISPLAYS
+
+    Examples:
+        >>> get_display("virtual") #doctest: +ELLIPSIS
+        <sense_hat_display_utils.display.VirtualDisplay object at 0x...>
+
+    """
+    if name == "sense_hat":
+        from sense_hat import SenseHat  # Slow to import, so only do it once there's a display to drive
+
+        return SenseHat()
+    elif name == "framebuffer":
+        from sense_hat_display_utils.framebuffer import FramebufferDisplay
+
+        return FramebufferDisplay(fb_device)
+    elif name == "virtual":
+        return VirtualDisplay()
+    else:
+        raise ValueError("Unknown display: {0}".format(name))
+
+
+class DisplayBackend(object):
+    """
+    The display methods of sense_hat.SenseHat that SenseHatUtility uses. Subclass this to drive something else.
+
+    Subclasses must implement set_pixels, get_pixels and _rotate. Gamma is kept here but only subclasses that can
+    apply it to their hardware do so, in _apply_gamma.
+    """
+
+    width = 8  # Pixels. Displays bigger than a Sense HAT, eg. canvas.TiledCanvas, override these
+    height = 8
+
+    def __init__(self):
+        self._rotation = 0
+        self._gamma = list(DEFAULT_GAMMA)
+
+    def set_pixels(self, pixel_list):
+        """
+        Args:
+            pixel_list (list): 64 [r, g, b] pixels, each value 0-255
+        """
+        raise NotImplementedError()
+
+    def get_pixels(self):
+        """
+        Returns:
+            64 [r, g, b] pixels
+        """
+        raise NotImplementedError()
+
+    def _rotate(self, r):
+        raise NotImplementedError()
+
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, r):
+        self.set_rotation(r, True)
+
+    def set_rotation(self, r=0, redraw=True):
+        """
+        Rotate the display.
+
+        Args:
+            r (int): 0, 90, 180 or 270 degrees.
+            redraw (bool, optional): Redraw what's on the display in the new orientation.
+
+        Raises:
+            ValueError: if r isn't a multiple of 90 between 0 and 270
+        """
+        if r not in PIXEL_MAPS:
+            raise ValueError("Rotation must be 0, 90, 180 or 270 degrees")
+        pixels = self.get_pixels() if redraw else None
+        self._rotation = r
+        self._rotate(r)
+        if redraw:
+            self.set_pixels(pixels)
+
+    @property
+    def gamma(self):
+        return list(self._gamma)
+
+    @gamma.setter
+    def gamma(self, buffer):
+        if len(buffer) != 32:
+            raise ValueError("Gamma array must be of length 32")
+        if not all(0 <= b <= 31 for b in buffer):
+            raise ValueError("Gamma values must be between 0 and 31")
+        self._gamma = list(buffer)
+        self._apply_gamma(self._gamma)
+
+    def _apply_gamma(self, buffer):
+        pass
+
+    def gamma_reset(self):
+        self.gamma = DEFAULT_GAMMA
+
+    @property
+    def low_light(self):
+        return self._gamma == LOW_LIGHT_GAMMA
+
+    @low_light.setter
+    def low_light(self, value):
+        self.gamma = LOW_LIGHT_GAMMA if value else DEFAULT_GAMMA
+
+    def clear(self, *args):
+        """
+        Set every pixel to black, or to a colour given as [r, g, b] or r, g, b
+        """
+        colour = [0, 0, 0] if not args else list(args[0]) if len(args) == 1 else list(args)
+        self.set_pixels([colour] * (self.width * self.height))
+
+
+RecordedFrame = collections.namedtuple("RecordedFrame", ["time", "pixels", "gamma"])
+
+
+class VirtualDisplay(DisplayBackend):
+    """
+    An in-memory stand-in for the Sense HAT LED matrix, which records every frame pushed to it.
+
+    Frames are recorded as the LEDs would show them, ie. after rotation, with the gamma table in force at the time.
+
+    Examples:
+        >>> display = VirtualDisplay()
+        >>> display.set_rotation(180)
+        >>> display.set_pixels([[255, 0, 0]] + [[0, 0, 0]] * 63)
+        >>> display.get_pixels()[0], display.frames[-1].pixels[63]
+        ([255, 0, 0], [255, 0, 0])
+        >>> display.compare([frame.pixels for frame in display.frames]) is None
+        True
+
+    """
+
+    def __init__(self, record=True, clock=time.monotonic):
+        """
+        Args:
+            record (bool, optional): Keep every frame pushed. Defaults to True.
+            clock (callable, optional): Time source for frame timestamps.
+        """
+        super().__init__()
+        self.record = record
+        self.clock = clock
+        self.frames = []
+        self._pixel_map = PIXEL_MAPS[0]
+        self._physical = [[0, 0, 0] for i in range(64)]
+
+    def _rotate(self, r):
+        self._pixel_map = PIXEL_MAPS[r]
+
+    def set_pixels(self, pixel_list):
+        """
+        Show and record a frame.
+
+        Raises:
+            ValueError: if there aren't 64 pixels, or a pixel isn't 3 values from 0 to 255. Nothing is shown if so.
+
+        Examples:
+            >>> display = VirtualDisplay()
+            >>> display.set_pixels([[255, 0, 0]] + [[0, 0, 256]] * 63)
+            Traceback (most recent call last):
+            ...
+            ValueError: Pixel elements must be [r, g, b] between 0 and 255
+            >>> display.get_pixels()[0], len(display.frames)
+            ([0, 0, 0], 0)
+
+        """
+        if len(pixel_list) != 64:
+            raise ValueError("Pixel lists must have 64 elements")
+        for pixel in pixel_list:
+            if len(pixel) != 3 or not all(0 <= value <= 255 for value in pixel):
+                raise ValueError("Pixel elements must be [r, g, b] between 0 and 255")
+        physical = self._physical
+        for position, pixel in zip(self._pixel_map, pixel_list):
+            physical[position] = list(pixel)
+        self._record()
+
+    def get_pixels(self):
+        return [list(self._physical[position]) for position in self._pixel_map]
+
+    def _apply_gamma(self, buffer):
+        self._record()
+
+    def _record(self):
+        if self.record:
+            self.frames.append(RecordedFrame(self.clock(), [list(pixel) for pixel in self._physical], tuple(self._gamma)))
+
+    def clear_recording(self):
+        self.frames = []
+
+    def durations(self, last=0.1):
+        """
+        Returns:
+            Seconds each recorded frame was on the display. The last frame is given last seconds.
+        """
+        times = [frame.time for frame in self.frames]
+        return [b - a for a, b in zip(times, times[1:])] + ([last] if times else [])
+
+    def rendered(self, frame):
+        """
+        What a recorded frame looked like, with the gamma table applied to each colour.
+
+        Args:
+            frame (RecordedFrame): A frame from frames.
+
+        Returns:
+            64 [r, g, b] pixels, each value 0-255
+        """
+        gamma = frame.gamma
+        return [[gamma[value >> 3] * 255 // 31 for value in pixel] for pixel in frame.pixels]
+
+    def save_animation(self, path, scale=16, apply_gamma=False, last=0.1):
+        """
+        Export the recording as an animated GIF or PNG, depending on the file extension.
+
+        Args:
+            path (str): File to write.
+            scale (int, optional): Pixels per LED. Defaults to 16.
+            apply_gamma (bool, optional): Show brightness as the gamma table would. Defaults to False.
+            last (float, optional): Seconds to show the last frame for.
+
+        Raises:
+            ValueError: if nothing has been recorded
+        """
+        from PIL import Image
+
+        if not self.frames:
+            raise ValueError("No frames recorded")
+        images = []
+        for frame in self.frames:
+            pixels = self.rendered(frame) if apply_gamma else frame.pixels
+            image = Image.new("RGB", (8, 8))
+            image.putdata([tuple(pixel) for pixel in pixels])
+            images.append(image.resize((8 * scale, 8 * scale), Image.NEAREST))
+        durations = [max(1, int(round(duration * 1000))) for duration in self.durations(last)]
+        images[0].save(path, save_all=True, append_images=images[1:], duration=durations, loop=0)
+
+    def save_golden(self, path):
+        """
+        Save the recorded frames' pixels as JSON, for compare() to check future recordings against.
+        """
+        with open(path, "w") as f:
+            json.dump([frame.pixels for frame in self.frames], f)
+
+    def compare(self, golden):
+        """
+        Compare the recorded frames' pixels against a golden frame sequence. Timing isn't compared.
+
+        Args:
+            golden: A list of frames (each 64 [r, g, b] pixels), or the path of a file written by save_golden().
+
+        Returns:
+            None if the recording matches, otherwise the index of the first frame that differs
+        """
+        if isinstance(golden, str):
+            with open(golden) as f:
+                golden = json.load(f)
+        for index, (recorded, expected) in enumerate(zip(self.frames, golden)):
+            if [list(pixel) for pixel in expected] != recorded.pixels:
+                return index
+        if len(self.frames) != len(golden):
+            return min(len(self.frames), len(golden))
+        return None
@@ -0,0 +1,237 @@
+"""
+Frames of pixels stored as one flat buffer of r, g, b bytes, instead of a list of [r, g, b] lists.
+
+A Frame is a single object however many pixels it has, so making, copying and pushing frames doesn't create and throw
+away a list for every pixel. It still looks like a list of [r, g, b] pixels to anything that indexes or iterates it,
+so it can be passed to any set_pixels().
+"""
+from sense_hat_display_utils.display import PIXEL_MAPS
+
+WIDTH = 8
+HEIGHT = 8
+
+
+def default_shape(count):
+    """
+    Pixel lists don't say how wide they are. Take them to be rows of 8 like the Sense HAT, or one row if they can't be.
+
+    Returns:
+        (width, height)
+    """
+    return (WIDTH, count // WIDTH) if count and count % WIDTH == 0 else (count, 1)
+
+
+class Frame(object):
+    """
+    A width x height frame of pixels, row by row from the top left, 3 bytes (r, g, b) per pixel.
+
+    Indexing and iterating give [r, g, b] lists like get_pixels(). Changing those doesn't change the frame: use
+    frame[index] = [r, g, b], or one of the in-place operations.
+
+    Examples:
+        >>> frame = Frame()
+        >>> frame.fill([0, 0, 255])
+        >>> frame[0] = [255, 0, 0]
+        >>> len(frame), len(frame.buffer), frame[0], frame[1]
+        (64, 192, [255, 0, 0], [0, 0, 255])
+        >>> frame.shift(1, 0)
+        >>> frame[0], frame[1]
+        ([0, 0, 0], [255, 0, 0])
+        >>> frame == Frame.from_pixels(frame.tolist())
+        True
+
+    """
+
+    __slots__ = ("width", "height", "buffer")
+
+    def __init__(self, width=WIDTH, height=HEIGHT, buffer=None):
+        """
+        Args:
+            width (int, optional): Pixels across.
+            height (int, optional): Pixels down.
+            buffer (optional): width * height * 3 bytes of pixels. A bytearray is used as it is, anything else is
+                copied. Defaults to black.
+
+        Raises:
+            ValueError: if buffer is the wrong size
+        """
+        self.width = width
+        self.height = height
+        if buffer is None:
+            buffer = bytearray(width * height * 3)
+        elif not isinstance(buffer, bytearray):
+            buffer = bytearray(buffer)
+        if len(buffer) != width * height * 3:
+            raise ValueError("A {0}x{1} frame needs {2} bytes, not {3}".format(width, height, width * height * 3,
+                                                                                len(buffer)))
+        self.buffer = buffer
+
+    @classmethod
+    def from_pixels(cls, pixels, width=None, height=None):
+        """
+        Make a frame from [r, g, b] pixels, eg. from get_pixels().
+
+        Args:
+            pixels: A list of [r, g, b] pixels, or a Frame, which is returned as it is.
+            width (int, optional): Pixels across. Defaults to 8 if the pixels make whole rows of 8, otherwise one row.
+            height (int, optional): Pixels down.
+
+        Raises:
+            ValueError: if a pixel isn't 3 values from 0 to 255, or there aren't width * height of them
+        """
+        if isinstance(pixels, Frame):
+            return pixels
+        if width is None:
+            width, height = default_shape(len(pixels))
+        elif height is None:
+            height = len(pixels) // width
+        buffer = bytearray(value for pixel in pixels for value in pixel)
+        if len(buffer) != len(pixels) * 3:
+            raise ValueError("Pixel elements must be [r, g, b] between 0 and 255")
+        return cls(width, height, buffer)
+
+    @classmethod
+    def from_image(cls, image):
+        """
+        Make a frame from a PIL image, in one copy.
+        """
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return cls(image.width, image.height, bytearray(image.tobytes()))
+
+    @classmethod
+    def solid(cls, colour, width=WIDTH, height=HEIGHT):
+        """
+        A frame of a single colour, given as [r, g, b] or (r, g, b).
+        """
+        return cls(width, height, bytearray(bytes(colour) * (width * height)))
+
+    def __len__(self):
+        return self.width * self.height
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pixel index out of range")
+        buffer, offset = self.buffer, index * 3
+        return [buffer[offset], buffer[offset + 1], buffer[offset + 2]]
+
+    def __setitem__(self, index, pixel):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pixel index out of range")
+        self.buffer[index * 3:index * 3 + 3] = bytes(pixel)
+
+    def __iter__(self):
+        buffer = self.buffer
+        for offset in range(0, len(buffer), 3):
+            yield [buffer[offset], buffer[offset + 1], buffer[offset + 2]]
+
+    def __eq__(self, other):
+        if isinstance(other, Frame):
+            return (self.width, self.height) == (other.width, other.height) and self.buffer == other.buffer
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(list(a) == b for a, b in zip(other, self))
+        return NotImplemented
+
+    __hash__ = None  # Frames can change
+
+    def __repr__(self):
+        return "<Frame {0}x{1}>".format(self.width, self.height)
+
+    def tolist(self):
+        """
+        Returns:
+            The pixels as a list of [r, g, b] lists, like get_pixels()
+        """
+        return list(self)
+
+    def copy(self):
+        return Frame(self.width, self.height, bytearray(self.buffer))
+
+    def as_array(self):
+        """
+        A NumPy view of the frame, height x width x 3 uint8. Changes to either show in the other.
+
+        Raises:
+            ImportError: if NumPy isn't installed
+        """
+        import numpy
+
+        return numpy.frombuffer(self.buffer, dtype=numpy.uint8).reshape(self.height, self.width, 3)
+
+    def as_image(self):
+        """
+        The frame as a PIL image. PIL keeps RGB images 4 bytes per pixel, so this is a copy.
+        """
+        from PIL import Image
+
+        return Image.frombuffer("RGB", (self.width, self.height), self.buffer, "raw", "RGB", 0, 1)
+
+    def fill(self, colour):
+        """
+        Set every pixel to colour, given as [r, g, b] or (r, g, b).
+        """
+        self.buffer[:] = bytes(colour) * len(self)
+
+    def blit(self, source, x=0, y=0):
+        """
+        Copy another frame onto this one with its top left corner at (x, y). Whatever falls outside is cut off.
+
+        Examples:
+            >>> frame = Frame(4, 2)
+            >>> frame.blit(Frame.solid([9, 9, 9], 2, 2), 3, -1)
+            >>> [pixel[0] for pixel in frame]
+            [0, 0, 0, 9, 0, 0, 0, 0]
+
+        """
+        left, right = max(0, x), min(self.width, x + source.width)
+        if left >= right:
+            return
+        row_bytes = (right - left) * 3
+        target, view = self.buffer, memoryview(source.buffer)
+        for row in range(max(0, y), min(self.height, y + source.height)):
+            start = (row * self.width + left) * 3
+            source_start = ((row - y) * source.width + left - x) * 3
+            target[start:start + row_bytes] = view[source_start:source_start + row_bytes]
+
+    def shift(self, dx, dy, colour=(0, 0, 0)):
+        """
+        Move everything dx pixels right and dy pixels down (negative for left and up), filling in with colour.
+        """
+        moved = self.copy()
+        self.fill(colour)
+        self.blit(moved, dx, dy)
+
+    def rotate(self, r):
+        """
+        Turn an 8x8 frame by 0, 90, 180 or 270 degrees, the way set_rotation(r) turns what's on the display.
+
+        Raises:
+            ValueError: if the frame isn't 8x8, or r isn't one of those angles
+        """
+        if (self.width, self.height) != (WIDTH, HEIGHT) or r not in PIXEL_MAPS:
+            raise ValueError("Only 8x8 frames can be rotated, by 0, 90, 180 or 270 degrees")
+        source, target = bytes(self.buffer), self.buffer
+        for index, position in enumerate(PIXEL_MAPS[r]):
+            target[position * 3:position * 3 + 3] = source[index * 3:index * 3 + 3]
+
+    def blend(self, other, weight):
+        """
+        Move every pixel weight (0-1) of the way towards the same pixel in other, rounding halves up.
+
+        Examples:
+            >>> frame = Frame.solid([200, 100, 0], 1, 1)
+            >>> frame.blend(Frame(1, 1), 0.25)
+            >>> frame[0]
+            [150, 75, 0]
+
+        """
+        if len(other) != len(self):
+            raise ValueError("Can't blend frames of different sizes")
+        other = Frame.from_pixels(other)
+        self.buffer[:] = bytes(int(a + (b - a) * weight + 0.5) for a, b in zip(self.buffer, other.buffer))
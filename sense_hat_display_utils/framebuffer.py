@@ -0,0 +1,161 @@
+import fcntl
+import glob
+import mmap
+import os
+import stat
+import struct
+
+from sense_hat_display_utils.display import PIXEL_MAPS, DisplayBackend
+from sense_hat_display_utils.frame import Frame
+
+SENSE_HAT_FB_NAME = "RPi-Sense FB"
+SENSE_HAT_FB_FBIOGET_GAMMA = 61696
+SENSE_HAT_FB_FBIOSET_GAMMA = 61697
+FRAME_BYTES = 8 * 8 * 2  # 64 RGB565 pixels
+
+# RGB565 lookup tables: packed = RED[r] | GREEN[g] | BLUE[b]
+RED = [(value >> 3) << 11 for value in range(256)]
+GREEN = [(value >> 2) << 5 for value in range(256)]
+BLUE = [value >> 3 for value in range(256)]
+
+_PIXELS = struct.Struct("=64H")  # Native byte order, like the sense_hat library
+
+
+def find_framebuffer():
+    """
+    Find the Sense HAT's framebuffer device.
+
+    Returns:
+        Path to the device, eg. /dev/fb1
+
+    Raises:
+        OSError: if there's no Sense HAT framebuffer
+    """
+    for name_file in glob.glob("/sys/class/graphics/fb*/name"):
+        with open(name_file) as f:
+            if f.read().strip() == SENSE_HAT_FB_NAME:
+                return os.path.join("/dev", os.path.basename(os.path.dirname(name_file)))
+    raise OSError("Cannot detect {0} device".format(SENSE_HAT_FB_NAME))
+
+
+class FramebufferDisplay(DisplayBackend):
+    """
+    Drives the Sense HAT LED matrix by writing straight into its memory-mapped framebuffer device.
+
+    A drop-in for the display methods of sense_hat.SenseHat, but set_pixels only writes the pixels that changed since
+    the last frame, so mostly-static animations cost next to nothing. That assumes nothing else is writing to the
+    display at the same time. Any file of at least 128 bytes can stand in for the device, in which case the gamma
+    table is only kept in memory.
+    """
+
+    def __init__(self, device=None):
+        """
+        Args:
+            device (str, optional): Path to the framebuffer device or stand-in file. Found automatically if not given.
+
+        Examples:
+            >>> import tempfile
+            >>> with tempfile.NamedTemporaryFile() as f:
+            ...     f.write(bytes(FRAME_BYTES))
+            ...     f.flush()
+            ...     fb = FramebufferDisplay(f.name)
+            ...     fb.set_pixels([[255, 0, 0]] + [[0, 0, 0]] * 63)
+            ...     fb.set_pixels([[255, 0, 0]] + [[0, 0, 0]] * 62 + [[0, 0, 255]])
+            ...     fb.pixels_written, fb.get_pixels()[0], fb.get_pixels()[63]
+            ...     fb.close()
+            128
+            (2, [248, 0, 0], [0, 0, 248])
+
+        """
+        super().__init__()
+        self.device = device or find_framebuffer()
+        self._file = open(self.device, "r+b")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), FRAME_BYTES)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        self._pixel_map = PIXEL_MAPS[0]
+        self._packed = list(_PIXELS.unpack(self._map[:FRAME_BYTES]))  # What's on the display, by framebuffer position
+        self.pixels_written = 0
+        self._is_device = stat.S_ISCHR(os.fstat(self._file.fileno()).st_mode)
+        if self._is_device:
+            buffer = bytearray(32)
+            fcntl.ioctl(self._file, SENSE_HAT_FB_FBIOGET_GAMMA, buffer)
+            self._gamma = list(buffer)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _apply_gamma(self, buffer):
+        if self._is_device:
+            fcntl.ioctl(self._file, SENSE_HAT_FB_FBIOSET_GAMMA, bytes(buffer))
+
+    def _rotate(self, r):
+        self._pixel_map = PIXEL_MAPS[r]
+
+    def set_pixels(self, pixel_list):
+        """
+        Update the display, writing only the pixels that changed.
+
+        Args:
+            pixel_list: A Frame, or 64 [r, g, b] pixels, each value 0-255
+
+        Raises:
+            ValueError: if there aren't 64 pixels, or a pixel isn't 3 values from 0 to 255, like the sense_hat library.
+                Nothing is written if so.
+
+        Examples:
+            >>> import tempfile
+            >>> with tempfile.NamedTemporaryFile() as f:
+            ...     f.write(bytes(FRAME_BYTES))
+            ...     f.flush()
+            ...     fb = FramebufferDisplay(f.name)
+            ...     for value in (-1, 256):
+            ...         try:
+            ...             fb.set_pixels([[value, 0, 0]] + [[0, 0, 0]] * 63)
+            ...         except ValueError as ex:
+            ...             print(ex)
+            ...     fb.pixels_written
+            ...     fb.close()
+            128
+            Pixel elements must be [r, g, b] between 0 and 255
+            Pixel elements must be [r, g, b] between 0 and 255
+            0
+
+        """
+        if len(pixel_list) != 64:
+            raise ValueError("Pixel lists must have 64 elements")
+        if isinstance(pixel_list, Frame):  # Read the channels straight out of its buffer, which can only hold 0-255
+            buffer = pixel_list.buffer
+            pixels = zip(buffer[0::3], buffer[1::3], buffer[2::3])
+        else:
+            for pixel in pixel_list:
+                if len(pixel) != 3 or not all(0 <= value <= 255 for value in pixel):
+                    raise ValueError("Pixel elements must be [r, g, b] between 0 and 255")
+            pixels = pixel_list
+        packed, framebuffer, pack_into = self._packed, self._map, struct.pack_into
+        for position, (r, g, b) in zip(self._pixel_map, pixels):
+            value = RED[r] | GREEN[g] | BLUE[b]
+            if packed[position] != value:
+                packed[position] = value
+                pack_into("=H", framebuffer, position * 2, value)
+                self.pixels_written += 1
+
+    def get_pixels(self):
+        """
+        Returns:
+            64 [r, g, b] pixels, as the sense_hat library would read them back (ie. with the RGB565 precision)
+        """
+        packed = _PIXELS.unpack(self._map[:FRAME_BYTES])
+        return [[(packed[position] & 0xF800) >> 8, (packed[position] & 0x7E0) >> 3, (packed[position] & 0x1F) << 3]
+                for position in self._pixel_map]
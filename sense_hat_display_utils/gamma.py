@@ -0,0 +1,55 @@
+"""
+Brightness effects done with the Sense HAT's 32-entry gamma table instead of the pixels.
+
+Rewriting the gamma table is a single small ioctl, whatever is on the display, and leaves the
+pixels themselves untouched.
+"""
+from sense_hat_display_utils.blend import EASINGS
+
+
+def scale_gamma(base, level):
+    """
+    Scale a gamma table's brightness.
+
+    Args:
+        base (list): 32 gamma values, each 0-31.
+        level (float): 0 (off) to 1 (as base).
+
+    Returns:
+        32 gamma values
+
+    Examples:
+        >>> scale_gamma([0, 10, 31], 0.5)
+        [0, 5, 16]
+
+    """
+    level = min(1.0, max(0.0, level))
+    return [int(value * level + 0.5) for value in base]
+
+
+def gamma_sequence(base, start, end, steps, easing="linear"):
+    """
+    Compute every gamma table of a brightness ramp.
+
+    Args:
+        base (list): The gamma table at full brightness.
+        start (float): Brightness level to ramp from, 0-1.
+        end (float): Brightness level to ramp to, 0-1. The last table is at this level.
+        steps (int): Number of tables to produce.
+        easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+    Returns:
+        List of steps gamma tables
+
+    Raises:
+        ValueError: if easing is unknown
+
+    Examples:
+        >>> gamma_sequence([0, 31], 1.0, 0.0, 2)
+        [[0, 16], [0, 0]]
+
+    """
+    if easing not in EASINGS:
+        raise ValueError("Unknown easing: {0}. Try one of {1}".format(easing, sorted(EASINGS)))
+    ease = EASINGS[easing]
+    return [scale_gamma(base, start + (end - start) * ease(step / steps)) for step in range(1, steps + 1)]
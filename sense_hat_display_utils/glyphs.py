@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from PIL import Image, ImageDraw
+
+Glyph = namedtuple("Glyph", ["mask", "offset", "advance"])
+Glyph.__doc__ = """
+A pre-rasterised character.
+
+mask is a 1-bit PIL image (None for blank glyphs such as spaces), offset is where
+the mask sits relative to the pen position and advance is how far the pen moves on.
+"""
+
+
+class GlyphAtlas(object):
+    """
+    Bounded LRU cache of rasterised glyphs, keyed by (font path, font size, glyph).
+
+    Rasterising text through ImageDraw.text is the expensive part of drawing a
+    message, particularly for TrueType fonts where every call goes through FreeType.
+    The atlas rasterises each character once and then draws text by pasting the
+    cached masks. It's safe to share between threads, eg. a ScrollPipeline's
+    render thread and the server's handler threads.
+    """
+
+    DEFAULT_MAX_GLYPHS = 1024  # Plenty for a few fonts' worth of Latin-1
+
+    def __init__(self, max_glyphs=DEFAULT_MAX_GLYPHS):
+        """
+        Args:
+            max_glyphs (int, optional): Evict the least recently used glyph beyond this many.
+        """
+        self.max_glyphs = max_glyphs
+        self._glyphs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def clear(self):
+        """
+        Forget all cached glyphs and reset the counters.
+        """
+        with self._lock:
+            self._glyphs.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict of cache size and hit/miss/eviction counters
+        """
+        with self._lock:
+            return {"size": len(self._glyphs), "max_size": self.max_glyphs, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+    def get(self, font, font_key, char):
+        """
+        Fetch a glyph from the atlas, rasterising it on a miss.
+
+        Args:
+            font: ImageFont object to rasterise with.
+            font_key (tuple): (font path, font size) identifying font.
+            char (str): A single character.
+
+        Returns:
+            Glyph
+
+        """
+        key = font_key + (char,)
+        with self._lock:
+            glyph = self._glyphs.get(key)
+            if glyph is not None:
+                self.hits += 1
+                self._glyphs.move_to_end(key)
+                return glyph
+            self.misses += 1
+
+        glyph = self._rasterise(font, char)  # Outside the lock: two threads might both rasterise it, which is harmless
+        with self._lock:
+            self._glyphs[key] = glyph
+            if len(self._glyphs) > self.max_glyphs:
+                self._glyphs.popitem(last=False)
+                self.evictions += 1
+        return glyph
+
+    def measure(self, text, font, font_key):
+        """
+        Width in pixels of text as draw() would draw it.
+
+        Examples:
+            >>> from PIL import ImageFont
+            >>> atlas = GlyphAtlas()
+            >>> font = ImageFont.load_default()
+            >>> atlas.measure("", font, ("default", 0))
+            0
+
+        """
+        x = right = 0
+        for char in text:
+            glyph = self.get(font, font_key, char)
+            if glyph.mask is not None:
+                right = max(right, x + glyph.offset[0] + glyph.mask.width)
+            x += glyph.advance
+        return max(x, right)
+
+    def draw(self, image, xy, text, fill, font, font_key):
+        """
+        Draw text onto image by pasting cached glyph masks. Equivalent to ImageDraw.text for single lines.
+
+        Args:
+            image: PIL image to draw onto.
+            xy (tuple): Top-left position of the text.
+            text (str): The text to draw.
+            fill: Colour to draw the text in, as understood by Image.paste.
+            font: ImageFont object.
+            font_key (tuple): (font path, font size) identifying font.
+
+        """
+        x, y = xy
+        for char in text:
+            glyph = self.get(font, font_key, char)
+            if glyph.mask is not None:
+                image.paste(fill, (x + glyph.offset[0], y + glyph.offset[1]), glyph.mask)
+            x += glyph.advance
+
+    @staticmethod
+    def _rasterise(font, char):
+        draw = ImageDraw.Draw(Image.new("1", (1, 1)))
+        if hasattr(font, "getlength"):
+            advance = int(round(font.getlength(char)))
+        else:  # Pillow < 8.0
+            advance = font.getsize(char)[0]
+        if hasattr(draw, "textbbox"):
+            left, top, right, bottom = draw.textbbox((0, 0), char, font)
+        else:  # Pillow < 8.0
+            left, top = 0, 0
+            right, bottom = draw.textsize(char, font)
+        if right <= left or bottom <= top:
+            return Glyph(None, (0, 0), advance)
+
+        mask = Image.new("1", (right - left, bottom - top), 0)
+        ImageDraw.Draw(mask).text((-left, -top), char, 1, font)
+        if mask.getbbox() is None:  # Nothing drawn, eg. a space in a bitmap font
+            return Glyph(None, (0, 0), advance)
+        return Glyph(mask, (left, top), advance)
+
+
+ATLAS = GlyphAtlas()  # Shared by every SenseHatUtility in the process
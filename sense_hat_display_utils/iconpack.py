@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""
+Icon packs: many icons in one file, looked up by name without reading the whole file.
+
+Layout (little-endian):
+
+    header   16 bytes   magic b"SHIP", version (u8), record format (u8), name size (u16), count (u32), reserved (u32)
+    index    count * name size bytes: icon names, UTF-8, NUL padded, sorted
+    records  count * record size bytes, in the same order as the index:
+             192 bytes of r, g, b for RECORD_RGB, or 64 palette indices (see icons.PALETTE) for RECORD_PALETTE
+
+The file is memory-mapped and the index binary searched, so opening a pack and showing one icon
+costs the same whether it holds ten icons or ten thousand.
+
+Build a pack with:
+
+    python -m sense_hat_display_utils.iconpack weather.shp --sheet weather.png --names weather.txt
+"""
+import argparse
+import bisect
+import mmap
+import struct
+
+from sense_hat_display_utils import icons
+from sense_hat_display_utils.frame import Frame
+
+MAGIC = b"SHIP"
+VERSION = 1
+RECORD_RGB = 0
+RECORD_PALETTE = 1
+RECORD_SIZES = {RECORD_RGB: 192, RECORD_PALETTE: 64}
+DEFAULT_NAME_SIZE = 32
+_HEADER = struct.Struct("<4sBBHII")
+
+
+class IconPack(object):
+    """
+    A read-only, memory-mapped icon pack.
+
+    Examples:
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile(suffix=".shp") as f:
+        ...     write_pack(f.name, from_icon_strings(icons.SenseHatIconCollection.icons), RECORD_PALETTE)
+        ...     pack = IconPack(f.name)
+        ...     len(pack), "estelada" in pack, pack.get_icon("estelada").pixels[0]
+        ...     pack.close()
+        (2, True, [0, 0, 255])
+
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The pack file.
+
+        Raises:
+            ValueError: if the file isn't an icon pack this version understands
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError("{0} is not an icon pack".format(path))
+        magic, version, self.record_format, self.name_size, self.count, reserved = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or self.record_format not in RECORD_SIZES:
+            self.close()
+            raise ValueError("{0} is not a version {1} icon pack".format(path, VERSION))
+        self.record_size = RECORD_SIZES[self.record_format]
+        self._records = _HEADER.size + self.count * self.name_size
+        if len(self._map) < self._records + self.count * self.record_size:
+            self.close()
+            raise ValueError("{0} is truncated".format(path))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return self._find(name) is not None
+
+    def _name(self, index):
+        start = _HEADER.size + index * self.name_size
+        return self._map[start:start + self.name_size]
+
+    def _find(self, name):
+        key = _encode_name(name, self.name_size)
+        if key is None:
+            return None
+        index = bisect.bisect_left(_Index(self), key)
+        if index < self.count and self._name(index) == key:
+            return index
+        return None
+
+    def names(self):
+        """
+        Generate the names of all icons in the pack, in sorted order.
+        """
+        for index in range(self.count):
+            yield self._name(index).rstrip(b"\0").decode("utf-8")
+
+    def get_icon(self, name):
+        """
+        Args:
+            name (str): Name of the icon.
+
+        Returns:
+            SenseHatIcon
+
+        Raises:
+            KeyError: if the pack has no icon called name
+        """
+        index = self._find(name)
+        if index is None:
+            raise KeyError(name)
+        start = self._records + index * self.record_size
+        record = self._map[start:start + self.record_size]
+        if self.record_format == RECORD_PALETTE:
+            return icons.SenseHatIcon(data=record)
+        return icons.SenseHatIcon(pixels=Frame(buffer=record))
+
+
+class _Index(object):
+    # A sequence view of a pack's names for bisect, reading each name from the mmap only when compared
+    def __init__(self, pack):
+        self.pack = pack
+
+    def __len__(self):
+        return self.pack.count
+
+    def __getitem__(self, index):
+        return self.pack._name(index)
+
+
+def _encode_name(name, name_size):
+    encoded = name.encode("utf-8")
+    if len(encoded) > name_size:
+        return None
+    return encoded.ljust(name_size, b"\0")
+
+
+def write_pack(path, pixels_by_name, record_format=RECORD_RGB, name_size=DEFAULT_NAME_SIZE):
+    """
+    Write an icon pack.
+
+    Args:
+        path (str): File to write.
+        pixels_by_name (dict): Icon name: 64 [r, g, b] pixels.
+        record_format (int, optional): RECORD_RGB or RECORD_PALETTE. Palette packs are a third of the size, but every
+            colour has to be in icons.PALETTE.
+        name_size (int, optional): Bytes per name in the index.
+
+    Raises:
+        ValueError: if a name is too long, an icon isn't 64 pixels or a colour isn't in the palette
+    """
+    palette = {rgb: index for index, rgb in enumerate(icons._PALETTE_RGB)}
+    entries = []
+    for name, pixels in pixels_by_name.items():
+        key = _encode_name(name, name_size)
+        if key is None:
+            raise ValueError("Icon name {0!r} is longer than {1} bytes".format(name, name_size))
+        if len(pixels) != 64:
+            raise ValueError("Icon {0!r} doesn't have 64 pixels".format(name))
+        if record_format == RECORD_PALETTE:
+            try:
+                record = bytes(palette[tuple(pixel)] for pixel in pixels)
+            except KeyError as ex:
+                raise ValueError("Icon {0!r} uses {1}, which isn't in the palette".format(name, list(ex.args[0])))
+        else:
+            record = bytes(Frame.from_pixels(pixels).buffer)
+        entries.append((key, record))
+    entries.sort()
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, record_format, name_size, len(entries), 0))
+        for key, record in entries:
+            f.write(key)
+        for key, record in entries:
+            f.write(record)
+
+
+def from_icon_strings(pixel_strings):
+    """
+    Convert icons in the SenseHatIconCollection.icons string format.
+
+    Args:
+        pixel_strings (dict): Icon name: 64 palette letters.
+
+    Returns:
+        dict of icon name: Frame
+    """
+    return {name: icons.SenseHatIcon(pixel_string).pixels for name, pixel_string in pixel_strings.items()}
+
+
+def from_sprite_sheet(path, names=None, prefix="sprite"):
+    """
+    Cut a PNG (or any image PIL can read) into 8x8 icons, left to right then top to bottom.
+
+    Args:
+        path (str): The sprite sheet. Its width and height must be multiples of 8.
+        names (list, optional): A name for each sprite. Sprites without a name are skipped.
+        prefix (str, optional): Used to name sprites prefix_0, prefix_1, ... when names isn't given.
+
+    Returns:
+        dict of icon name: Frame
+
+    Raises:
+        ValueError: if the sheet isn't a whole number of sprites
+    """
+    from PIL import Image
+
+    sheet = Image.open(path).convert("RGBA")
+    if sheet.width % 8 or sheet.height % 8:
+        raise ValueError("Sprite sheet {0} isn't a multiple of 8 pixels in each direction".format(path))
+    background = Image.new("RGBA", sheet.size, (0, 0, 0, 255))  # Transparency shows as off
+    sheet = Image.alpha_composite(background, sheet).convert("RGB")
+
+    sprites = {}
+    for index, (top, left) in enumerate((top, left) for top in range(0, sheet.height, 8)
+                                        for left in range(0, sheet.width, 8)):
+        if names is None:
+            name = "{0}_{1}".format(prefix, index)
+        elif index < len(names):
+            name = names[index]
+        else:
+            break
+        sprite = sheet.crop((left, top, left + 8, top + 8))
+        sprites[name] = Frame.from_image(sprite)
+    return sprites
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Sense HAT icon pack")
+    parser.add_argument("output", help="Icon pack file to write")
+    parser.add_argument("--sheet", action="append", default=[], help="PNG sprite sheet to add (can be repeated)")
+    parser.add_argument("--names", action="append", default=[],
+                        help="Text file of sprite names, one per line, for the --sheet in the same position")
+    parser.add_argument("--builtin", action="store_true", help="Add the icons built in to sense_hat_display_utils")
+    parser.add_argument("--palette", action="store_true",
+                        help="Store palette indices instead of RGB. Every colour must be in the built-in palette")
+    args = parser.parse_args()
+
+    pixels_by_name = from_icon_strings(icons.SenseHatIconCollection.icons) if args.builtin else {}
+    for number, sheet in enumerate(args.sheet):
+        names = None
+        if number < len(args.names):
+            with open(args.names[number]) as f:
+                names = [line.strip() for line in f if line.strip()]
+        prefix = sheet.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        pixels_by_name.update(from_sprite_sheet(sheet, names, prefix))
+    write_pack(args.output, pixels_by_name, RECORD_PALETTE if args.palette else RECORD_RGB)
+    print("Wrote {0} icons to {1}".format(len(pixels_by_name), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import time
 
+from sense_hat_display_utils.frame import Frame
+
 W = [255, 255, 255]  # white
 R = [255, 0, 0]  # red
 G = [0, 255, 0]  # green
@@ -16,6 +18,117 @@ U = [0, 128, 255]  # ultramarine
 V = [127, 0, 255]  # violet
 S = [128, 128, 128]  # stone
 
+# Palette letters, in the order of their index in compiled icons
+PALETTE = "WRGBCMYKOPLTUVS"
+_PALETTE_RGB = [tuple(globals()[letter]) for letter in PALETTE]
+_PALETTE_BYTES = [bytes(rgb) for rgb in _PALETTE_RGB]
+_PALETTE_INDEX = {ord(letter): chr(index) for index, letter in enumerate(PALETTE)}
+_PALETTE_INDEX[ord(" ")] = None  # Spaces are just there to line rows up
+
+_sources = {}  # Icon name: pixel string
+_icons = {}  # Icon name: compiled SenseHatIcon, once something has asked for it
+CLOCK_MINUTES = 12 * 60  # The clock face repeats every 12 hours
+_packs = []  # Loaded iconpack.IconPacks, searched in order after the registry
+
+
+def compile_icon(pixel_string):
+    """
+    Compile a pixel string into 64 bytes of palette indices.
+
+    Args:
+        pixel_string (str): 64 palette letters, optionally padded with spaces.
+
+    Returns:
+        bytes
+
+    Raises:
+        ValueError: if the string isn't 64 palette letters
+
+    Examples:
+        >>> list(compile_icon("WRGBCMYK" * 8)[:9])
+        [0, 1, 2, 3, 4, 5, 6, 7, 0]
+
+    """
+    indices = pixel_string.translate(_PALETTE_INDEX)
+    try:
+        data = indices.encode("latin-1")
+    except UnicodeEncodeError:
+        data = b""
+    if len(data) != 64 or max(data) >= len(PALETTE):
+        raise ValueError("Icons must be 64 of the letters {0}".format(PALETTE))
+    return data
+
+
+def register_icon(name, pixel_string):
+    """
+    Add an icon to the registry shared by every SenseHatUtility. It's compiled the first time it's shown.
+
+    Args:
+        name (str): Name to show the icon by.
+        pixel_string (str): 64 palette letters, optionally padded with spaces.
+
+    """
+    _sources[name] = pixel_string
+    _icons.pop(name, None)
+
+
+def load_pack(path):
+    """
+    Make the icons in an icon pack available to get_icon(). Only the pack's header is read until an icon is asked for.
+
+    Args:
+        path (str): An icon pack file, see iconpack.
+
+    Returns:
+        iconpack.IconPack
+
+    Raises:
+        ValueError: if the file isn't an icon pack
+    """
+    from sense_hat_display_utils.iconpack import IconPack
+
+    pack = IconPack(path)
+    _packs.append(pack)
+    return pack
+
+
+def get_icon(name):
+    """
+    Look up a registered icon, or failing that an icon in a loaded pack.
+
+    Args:
+        name (str): Name of the icon.
+
+    Returns:
+        SenseHatIcon
+
+    Raises:
+        KeyError: if there's no icon called name
+
+    Examples:
+        >>> get_icon("estelada").pixels[0]
+        [0, 0, 255]
+
+    """
+    icon = _icons.get(name)
+    if icon is None:
+        if name in _sources:
+            icon = _icons[name] = SenseHatIcon(data=compile_icon(_sources[name]))
+        else:
+            for pack in _packs:
+                if name in pack:
+                    return pack.get_icon(name)
+            raise KeyError(name)
+    return icon
+
+
+def icon_names():
+    """
+    Returns:
+        Names of all registered icons
+    """
+    return sorted(_sources)
+
 
 class SenseHatIcon(object):
     """
@@ -55,18 +168,46 @@ class SenseHatIcon(object):
     WRGBCMYK\
     "
 
-    def __init__(self, pixel_string=None):
-        if pixel_string is None:
-            self.pixels = [eval(i) for i in list(self.__sample.replace(" ", ""))]
-        else:
-            self.pixels = [eval(i) for i in list(pixel_string.replace(" ",
-                                                                      ""))]  # This doesn't work now constants are "self.XXX" UPDATE: F**K YOU PYTHON. Set constants to module-level instead
-            # self.pixels = [eval(i) for i in list(["self."+item for item in list(pixel_string.replace(" ",""))])]
+    def __init__(self, pixel_string=None, data=None, pixels=None):
+        """
+        Args:
+            pixel_string (str, optional): 64 palette letters. Defaults to a sample of the v1 palette.
+            data (bytes, optional): An already compiled icon, from compile_icon(). Used instead of pixel_string.
+            pixels (optional): A Frame or 64 [r, g, b] pixels, for icons that don't fit the palette. Used instead of
+                both.
+        """
+        if data is None and pixels is None:
+            data = compile_icon(self.__sample if pixel_string is None else pixel_string)
+        self.data = data
+        self._pixels = None if pixels is None else Frame.from_pixels(pixels)
+
+    @property
+    def pixels(self):
+        """
+        The icon as a Frame, decoded from the palette the first time it's needed. Shared, so treat it as read-only.
+        """
+        if self._pixels is None:
+            self._pixels = Frame(buffer=b"".join([_PALETTE_BYTES[index] for index in self.data]))
+        return self._pixels
 
 
 class SenseHatIconCollection(dict):
     """
     Icon collection for the Sense HAT
+
+    Icons are looked up in the shared registry when first asked for, so creating a collection costs nothing. It still
+    has every registered icon and every icon in a loaded pack as a key.
+
+    Examples:
+        >>> collection = SenseHatIconCollection()
+        >>> "estelada" in collection, "qwertyuiop" in collection
+        (True, False)
+        >>> builtin = [name for name in collection if name in SenseHatIconCollection.icons]
+        >>> builtin == sorted(SenseHatIconCollection.icons)
+        True
+        >>> len(collection) == len(collection.keys()), collection.get("qwertyuiop")
+        (True, None)
+
     """
     icons = {
         "template": "\
@@ -91,10 +232,44 @@ class SenseHatIconCollection(dict):
         ",
     }
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        for icon in self.icons:
-            self[icon] = SenseHatIcon(self.icons[icon])
+    _clock_faces = None  # Filled in by _clock_table()
+    _clock_index = None
+    _clock_changes = None
+
+    def __missing__(self, name):
+        return get_icon(name)
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in _sources or any(name in pack for pack in _packs)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        """
+        Returns:
+            Names of the registered icons, then of icons in loaded packs, then of any added to this collection
+        """
+        names = dict.fromkeys(icon_names())
+        for pack in _packs:
+            names.update(dict.fromkeys(pack.names()))
+        names.update(dict.fromkeys(dict.keys(self)))
+        return list(names)
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
 
     def clock(self, hhmm=None):
         """
@@ -104,9 +279,76 @@ class SenseHatIconCollection(dict):
         How many minutes? Minimum 8: 0,7.5,15,22.5,30,37.5,45,52.5
         Possibly try 16 by shifting outer segment one block clockwise, giving:
         0.0, 3.75, 7.5, 11.25, 15.0, 18.75, 22.5, 26.25, 30.0, 33.75, 37.5, 41.25, 45.0, 48.75, 52.5, 56.25, 60.0
+
+        All the faces are worked out once, the first time a clock is asked for, and shared.
+
+        Args:
+            hhmm (str, optional): Time to show, eg. "0930". Defaults to now.
+
+        Returns:
+            SenseHatIcon. It's shared, so don't change it.
+
+        Examples:
+            >>> ICONS.clock("0000") is ICONS.clock("1201")
+            True
+            >>> ICONS.clock("0300").data != ICONS.clock("0900").data
+            True
+
+        """
+        if hhmm is None:
+            now = time.localtime()
+        else:
+            now = time.strptime(hhmm, "%H%M")
+        faces, table, changes = self._clock_table()
+        return faces[table[now.tm_hour % 12 * 60 + now.tm_min]]
+
+    def clock_unchanged_for(self, hhmm=None):
+        """
+        How long the clock face will stay as it is.
+
+        Args:
+            hhmm (str, optional): Time to start from, eg. "0930". Defaults to now.
+
         Returns:
+            Whole minutes until the face next changes, counting the current minute
+
+        Examples:
+            >>> ICONS.clock_unchanged_for("0002"), ICONS.clock_unchanged_for("0004")
+            (4, 2)
+
+        """
+        if hhmm is None:
+            now = time.localtime()
+        else:
+            now = time.strptime(hhmm, "%H%M")
+        faces, table, changes = self._clock_table()
+        return changes[now.tm_hour % 12 * 60 + now.tm_min]
 
+    @classmethod
+    def _clock_table(cls):
         """
+        Returns:
+            The distinct clock faces, the index of the face for each minute of 12 hours, and the minutes each face
+            stays up from each minute
+        """
+        if cls._clock_faces is None:
+            faces = {}
+            table = []
+            for minute in range(CLOCK_MINUTES):
+                template = cls._clock_face(minute // 60, minute % 60)
+                table.append(faces.setdefault(template, len(faces)))
+            changes = [0] * CLOCK_MINUTES
+            for minute in reversed(range(CLOCK_MINUTES * 2)):  # Twice round, to count across 12 o'clock
+                following = (minute + 1) % CLOCK_MINUTES
+                same = table[minute % CLOCK_MINUTES] == table[following]
+                changes[minute % CLOCK_MINUTES] = changes[following] + 1 if same else 1
+            cls._clock_changes = tuple(changes)
+            cls._clock_index = tuple(table)
+            cls._clock_faces = tuple(SenseHatIcon(template) for template in faces)
+        return cls._clock_faces, cls._clock_index, cls._clock_changes
+
+    @classmethod
+    def _clock_face(cls, hours, minutes):
         template = "\
             RRRRRRRK\
             RKKKKKRK\
@@ -118,13 +360,6 @@ class SenseHatIconCollection(dict):
             KKKKKKKK\
         ".replace(" ", "")
 
-        if hhmm is None:
-            now = time.localtime()
-        else:
-            now = time.strptime(hhmm, "%H%M")
-
-        hours = now.tm_hour % 12
-        minutes = now.tm_min
         decimal_time = hours + (minutes / 60)
 
         # Hours
@@ -151,7 +386,7 @@ class SenseHatIconCollection(dict):
         interval = 12 / 8  # hours in clock face divided by hours able to display
         shift = interval / 2
         hour_map = {-1: 19, 0: 20, 1: 28, 2: 36, 3: 35, 4: 34, 5: 26, 6: 18, 7: 19}
-        template = self._map_time_to_pixels(decimal_time, hour_map, interval, shift, template, 8)
+        template = cls._map_time_to_pixels(decimal_time, hour_map, interval, shift, template, 8)
 
         # Minutes
         interval = 60 / 16  # minutes in hour divided by minutes able to display
@@ -161,9 +396,9 @@ class SenseHatIconCollection(dict):
             5: [36, 45], 6: [35, 44], 7: [35, 43], 8: [35, 42], 9: [34, 41], 10: [26, 33],
             11: [26, 25], 12: [26, 17], 13: [18, 9], 14: [19, 10], 15: [19, 11]
         }
-        template = self._map_time_to_pixels(minutes, minute_map, interval, shift, template, 16)
+        template = cls._map_time_to_pixels(minutes, minute_map, interval, shift, template, 16)
 
-        return SenseHatIcon(template)
+        return template
 
     @staticmethod
     def _map_time_to_pixels(decimal_time, pixel_map, interval, shift, template, stop, colour="W"):
@@ -179,6 +414,12 @@ class SenseHatIconCollection(dict):
         return "".join(string_list)
 
 
+for _name, _pixel_string in SenseHatIconCollection.icons.items():
+    register_icon(_name, _pixel_string)
+
+ICONS = SenseHatIconCollection()  # Shared by every SenseHatUtility
+
+
 if __name__ == '__main__':
     import doctest
 
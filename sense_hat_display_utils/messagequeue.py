@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class Preempted(Exception):
+    """
+    Raised at a frame boundary inside an action when a higher priority item is waiting to be shown
+    """
+    pass
+
+
+class QueueItem(object):
+    """
+    An action waiting in a MessageQueue, eg. a scroll and its arguments
+    """
+
+    def __init__(self, action, kwargs, priority=0, ttl=None, resume=False):
+        """
+        Args:
+            action (str): Name of the SenseHatUtility action to run.
+            kwargs (dict): Keyword arguments for the action.
+            priority (int, optional): Higher numbers run first, and preempt running lower numbers.
+            ttl (float, optional): Seconds the item may wait before it's dropped unshown. None waits forever.
+            resume (bool, optional): If preempted, run again once the preempting items are done.
+        """
+        self.action = action
+        self.kwargs = kwargs
+        self.priority = priority
+        self.expires = None if ttl is None else time.monotonic() + ttl
+        self.resume = resume
+        self.error = None
+        self.expired = False
+        self.preempted = False
+        self._done = threading.Event()
+
+    def __repr__(self):
+        return "<QueueItem {0} priority={1}>".format(self.action, self.priority)
+
+    def is_expired(self, now=None):
+        return self.expires is not None and (time.monotonic() if now is None else now) >= self.expires
+
+    def wait(self, timeout=None):
+        """
+        Block until the item has been shown, failed, been preempted for good or expired.
+
+        Returns:
+            True if the item is finished, False on timeout
+        """
+        return self._done.wait(timeout)
+
+    def finish(self):
+        self._done.set()
+
+
+class MessageQueue(object):
+    """
+    Thread-safe priority queue of QueueItems. Equal priorities come out in the order they went in.
+
+    Examples:
+        >>> queue = MessageQueue()
+        >>> for action, priority in [("scroll", 0), ("pulse", 5), ("fade_out", 0)]:
+        ...     queue.put(QueueItem(action, {}, priority))
+        >>> [queue.get().action for i in range(3)]
+        ['pulse', 'scroll', 'fade_out']
+
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self.expired = 0
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap)
+
+    def put(self, item):
+        with self._condition:
+            heapq.heappush(self._heap, (-item.priority, next(self._counter), item))
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Remove and return the highest priority item, dropping any that have expired on the way.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an item. None waits forever.
+
+        Returns:
+            QueueItem, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._heap:
+                    item = heapq.heappop(self._heap)[2]
+                    if not item.is_expired(now):
+                        return item
+                    item.expired = True
+                    item.finish()
+                    self.expired += 1
+                if deadline is not None and now >= deadline:
+                    return None
+                self._condition.wait(None if deadline is None else deadline - now)
+
+    def highest_priority(self):
+        """
+        Returns:
+            The priority of the next unexpired item, or None if there isn't one
+        """
+        with self._condition:
+            now = time.monotonic()
+            if self._heap and not self._heap[0][2].is_expired(now):  # The usual case
+                return -self._heap[0][0]
+            for priority, count, item in sorted(self._heap):
+                if not item.is_expired(now):
+                    return -priority
+        return None
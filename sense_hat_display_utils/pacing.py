@@ -0,0 +1,121 @@
+import time
+
+
+class FrameScheduler(object):
+    """
+    Paces an animation against absolute deadlines, so the frame period doesn't stretch by however long rendering and
+    pushing each frame took.
+
+    Frame i is due at start + i * period. A frame whose successor is already due is dropped rather than shown late, so a
+    slow Pi keeps to time by showing fewer frames instead of taking longer.
+
+    Examples:
+        >>> fake_time = [0.0]
+        >>> def fake_sleep(seconds):
+        ...     fake_time[0] += seconds
+        >>> clock = FrameScheduler(0.1, clock=lambda: fake_time[0], sleep=fake_sleep)
+        >>> shown = []
+        >>> for index in clock.frames(5):
+        ...     shown.append(index)
+        ...     if index == 1:
+        ...         fake_time[0] += 0.25  # A slow frame
+        >>> shown
+        [0, 1, 3, 4]
+        >>> clock.stats()["dropped"], clock.stats()["late"], round(fake_time[0], 2)
+        (1, 1, 0.5)
+
+    """
+
+    SLACK = 0.002  # Seconds a frame may be late by before it counts as a missed deadline
+
+    def __init__(self, period, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            period (float): Seconds between frames.
+            clock (callable, optional): Monotonic time source.
+            sleep (callable, optional): Sleeps for a number of seconds.
+        """
+        self.period = max(0.0, period)
+        self.clock = clock
+        self.sleep = sleep
+        self.start = None
+        self.end = None
+        self._slot = 0  # Frame slots used by previous calls to frames()
+        self.shown = 0
+        self.dropped = 0
+        self.late = 0
+        self.total_overshoot = 0.0
+        self.max_overshoot = 0.0
+
+    def frames(self, count):
+        """
+        Yield the index of each frame to show, when it's due to be shown. Returns once the last frame has been held
+        for a full period. Calling this again, eg. for the next repeat of an animation, carries on the same timeline.
+
+        Args:
+            count (int): The number of frames in the animation.
+
+        """
+        for index, wait in self.schedule(count):
+            if index is None:
+                self.sleep(wait)
+            else:
+                yield index
+
+    def schedule(self, count):
+        """
+        The timing behind frames(), for callers that need to wait their own way, eg. with asyncio.sleep.
+
+        Args:
+            count (int): The number of frames in the animation.
+
+        Yields:
+            (None, seconds) to wait, or (index, 0.0) when frame index is due to be shown
+
+        """
+        now = self.clock()
+        first = self._slot
+        if self.start is None or now > self.start + (first + 1) * self.period:
+            # First call, or the caller was busy between calls; don't count that against this animation
+            self.start = now - first * self.period
+        for index in range(count):
+            deadline = self.start + (first + index) * self.period
+            now = self.clock()
+            if index < count - 1 and self.period and now >= deadline + self.period:
+                self.dropped += 1
+                continue
+            if now < deadline:
+                yield None, deadline - now
+                now = self.clock()
+            overshoot = max(0.0, now - deadline)
+            self.total_overshoot += overshoot
+            self.max_overshoot = max(self.max_overshoot, overshoot)
+            if overshoot > self.SLACK:
+                self.late += 1
+            self.shown += 1
+            yield index, 0.0
+
+        # Hold the last frame for its period too
+        end = self.start + (first + count) * self.period
+        now = self.clock()
+        if now < end:
+            yield None, end - now
+        self.end = max(now, end)
+        self._slot = first + count
+
+    def stats(self):
+        """
+        Returns:
+            dict of frames shown and dropped, actual frames per second and overshoot in seconds
+        """
+        elapsed = (self.end if self.end is not None else self.clock()) - self.start if self.start is not None else 0
+        return {
+            "period": self.period,
+            "shown": self.shown,
+            "dropped": self.dropped,
+            "late": self.late,
+            "missed": self.dropped + self.late,
+            "fps": self.shown / elapsed if elapsed > 0 else 0.0,
+            "mean_overshoot": self.total_overshoot / self.shown if self.shown else 0.0,
+            "max_overshoot": self.max_overshoot,
+        }
@@ -0,0 +1,211 @@
+"""
+Streaming scroll: reading lines, rendering them and scrolling them across the display all run at once.
+
+    reader thread -> LineBuffer -> render thread -> rendered strips -> display (the calling thread)
+
+Both buffers are bounded, so a fast writer can't make memory grow without limit. When lines arrive faster than they
+can be scrolled, the LineBuffer either holds the reader back (backpressure) or coalesces them, depending on its policy.
+"""
+import collections
+import queue
+import threading
+
+COALESCE = ("none", "join", "drop_oldest", "keep_latest")
+_DONE = object()  # Sent down the pipeline after the last line
+
+
+class LineBuffer(object):
+    """
+    Bounded, thread-safe buffer of lines waiting to be rendered, which coalesces bursts according to a policy:
+
+        none:        Keep every line. The writer waits while the buffer is full.
+        join:        Take everything waiting as one message, joined by separator. The writer waits while it's full.
+        drop_oldest: Keep every line, but when the buffer is full the oldest waiting line is dropped.
+        keep_latest: Only the newest line waits; anything older is dropped.
+
+    Examples:
+        >>> buffer = LineBuffer("join", separator=" | ")
+        >>> for line in ["one", "two", "three"]:
+        ...     buffer.put(line)
+        >>> buffer.close()
+        >>> buffer.take(), buffer.take()
+        ('one | two | three', None)
+        >>> buffer = LineBuffer("drop_oldest", max_lines=2)
+        >>> for line in ["one", "two", "three"]:
+        ...     buffer.put(line)
+        >>> buffer.take(), buffer.dropped
+        ('two', 1)
+
+    """
+
+    def __init__(self, policy="none", max_lines=8, separator="  "):
+        """
+        Args:
+            policy (str, optional): One of COALESCE.
+            max_lines (int, optional): Most lines to hold.
+            separator (str, optional): Goes between lines joined by the "join" policy.
+
+        Raises:
+            ValueError: if policy is unknown
+        """
+        if policy not in COALESCE:
+            raise ValueError("Unknown coalesce policy: {0}. Try one of {1}".format(policy, list(COALESCE)))
+        self.policy = policy
+        self.max_lines = max(1, max_lines)
+        self.separator = separator
+        self.dropped = 0
+        self.joined = 0
+        self.closed = False
+        self._lines = collections.deque()
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._lines)
+
+    def put(self, line):
+        """
+        Add a line, waiting for room if the policy applies backpressure. Lines put after close() are dropped.
+        """
+        with self._condition:
+            if self.policy == "keep_latest":
+                self.dropped += len(self._lines)
+                self._lines.clear()
+            elif self.policy == "drop_oldest":
+                if len(self._lines) >= self.max_lines:
+                    self._lines.popleft()
+                    self.dropped += 1
+            else:
+                while len(self._lines) >= self.max_lines and not self.closed:
+                    self._condition.wait()
+            if self.closed:
+                self.dropped += 1
+                return
+            self._lines.append(line)
+            self._condition.notify_all()
+
+    def take(self):
+        """
+        Wait for the next message.
+
+        Returns:
+            The message, or None once the buffer is closed and empty
+        """
+        with self._condition:
+            while not self._lines and not self.closed:
+                self._condition.wait()
+            if not self._lines:
+                return None
+            if self.policy == "join":
+                self.joined += len(self._lines) - 1
+                message = self.separator.join(line.strip() for line in self._lines)
+                self._lines.clear()
+            else:
+                message = self._lines.popleft()
+            self._condition.notify_all()
+            return message
+
+    def close(self):
+        """
+        No more lines are coming. Wakes up anything waiting.
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ScrollPipeline(object):
+    """
+    Scrolls a stream of lines, eg. stdin, rendering the next line while the current one is scrolling.
+    """
+
+    POLL = 0.1  # Seconds between checks for the display stage having stopped
+
+    def __init__(self, utility, coalesce="none", max_pending=8, max_rendered=2, separator="  "):
+        """
+        Args:
+            utility (SenseHatUtility): Renders and shows the lines.
+            coalesce (str, optional): What to do with bursts of lines, one of COALESCE.
+            max_pending (int, optional): Most lines to hold before rendering.
+            max_rendered (int, optional): Most rendered lines to hold before showing.
+            separator (str, optional): Goes between lines joined by the "join" policy.
+
+        Raises:
+            ValueError: if coalesce is unknown
+        """
+        self.utility = utility
+        self.lines = LineBuffer(coalesce, max_pending, separator)
+        self.rendered = queue.Queue(max(1, max_rendered))
+        self.read = 0
+        self.shown = 0
+        self.error = None
+        self._stopped = threading.Event()
+
+    def stats(self):
+        """
+        Returns:
+            dict of line counters
+        """
+        return {"read": self.read, "dropped": self.lines.dropped, "joined": self.lines.joined, "shown": self.shown,
+                "pending": len(self.lines), "rendered": self.rendered.qsize()}
+
+    def run(self, lines, speed, **render_kwargs):
+        """
+        Scroll every line, returning once the stream ends and the last line has scrolled off.
+
+        Args:
+            lines: Iterable of lines, eg. sys.stdin.
+            speed (float): Seconds per frame.
+            **render_kwargs: Arguments for SenseHatUtility._render_strip, eg. colour.
+
+        """
+        reader = threading.Thread(target=self._read, args=(lines,), name="scroll-reader", daemon=True)
+        renderer = threading.Thread(target=self._render, args=(render_kwargs,), name="scroll-renderer", daemon=True)
+        reader.start()
+        renderer.start()
+        try:
+            while True:
+                strip = self.rendered.get()
+                if strip is _DONE:
+                    break
+                self.utility._animate(strip, speed)
+                self.shown += 1
+        finally:
+            # The reader may be stuck waiting for input, but it's a daemon thread and will go when it can
+            self._stopped.set()
+            self.lines.close()
+            renderer.join()
+        if self.error is not None:
+            raise self.error
+
+    def _read(self, lines):
+        try:
+            for line in lines:
+                if self._stopped.is_set():
+                    break
+                self.read += 1
+                self.lines.put(line.rstrip("\r\n"))
+        except Exception as ex:
+            self.error = ex
+        finally:
+            self.lines.close()
+
+    def _render(self, render_kwargs):
+        try:
+            while not self._stopped.is_set():
+                message = self.lines.take()
+                if message is None:
+                    break
+                self._hand_on(self.utility._render_strip(message, **render_kwargs))
+        except Exception as ex:
+            self.error = ex
+        finally:
+            self._hand_on(_DONE)
+
+    def _hand_on(self, item):
+        # Wait for the display stage to make room, unless it's stopped
+        while not self._stopped.is_set():
+            try:
+                self.rendered.put(item, timeout=self.POLL)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,192 @@
+"""
+Playlists: a sequence of actions run by one process, eg. an alert that pulses, scrolls a message and shows an icon.
+
+Running a playlist costs one process start, one display set-up and one load of each font, however many steps it has,
+and messages rendered by one step are in the render cache for the next. Each step is an action, its arguments, how many
+times to run it and how long to wait afterwards, as JSON lines:
+
+    {"action": "pulse", "args": {"colour": "red", "speed": 0.05}, "repeat": 3}
+    {"action": "scroll", "args": {"message": "Front door open", "colour": "red"}, "delay": 1}
+
+or YAML (if PyYAML is installed):
+
+    - action: pulse
+      args: {colour: red, speed: 0.05}
+      repeat: 3
+"""
+import collections
+import json
+import sys
+import time
+
+from sense_hat_display_utils import defaults
+
+# Actions a playlist can run: the same ones as the display server, so a playlist runs the same with --socket
+ACTIONS = defaults.FINITE_ACTIONS
+COLOUR_ARGS = defaults.COLOUR_ARGS
+FORMATS = ("jsonl", "yaml")
+
+PlaylistStep = collections.namedtuple("PlaylistStep", ["action", "args", "repeat", "delay"])
+
+
+def parse_playlist(text, format=None):
+    """
+    Read a playlist.
+
+    Args:
+        text (str): The playlist.
+        format (str, optional): One of FORMATS. Guessed if not given: JSON lines if the first step starts with "{",
+            otherwise YAML. Blank lines and lines starting with "#" are skipped in JSON lines.
+
+    Returns:
+        List of PlaylistStep
+
+    Raises:
+        ValueError: if the playlist can't be read, or a step is invalid
+
+    Examples:
+        >>> parse_playlist('''
+        ... # Alert
+        ... {"action": "pulse", "args": {"colour": "red"}, "repeat": 3}
+        ... {"action": "scroll", "args": {"message": "Door open"}, "delay": 0.5}
+        ... ''')
+        [PlaylistStep(action='pulse', args={'colour': 'red'}, repeat=3, delay=0.0), PlaylistStep(action='scroll', args={'message': 'Door open'}, repeat=1, delay=0.5)]
+        >>> parse_playlist('{"action": "scroll", "repeat": -1}')
+        Traceback (most recent call last):
+        ...
+        ValueError: Step 1: repeat must be at least 1
+        >>> parse_playlist('{"action": "live_clock"}') #doctest: +ELLIPSIS
+        Traceback (most recent call last):
+        ...
+        ValueError: Step 1: unknown action live_clock. Try one of ['print', ...]
+
+    """
+    lines = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if format is None:
+        format = "jsonl" if not lines or lines[0].lstrip().startswith("{") else "yaml"
+    if format == "jsonl":
+        steps = []
+        for number, line in enumerate(lines, 1):
+            try:
+                steps.append(json.loads(line))
+            except ValueError as ex:
+                raise ValueError("Step {0}: {1}".format(number, ex))
+    elif format == "yaml":
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML playlists needs PyYAML (pip install sense-hat-display-utils[yaml])")
+        try:
+            steps = yaml.safe_load(text) or []
+        except yaml.YAMLError as ex:
+            raise ValueError("Not a valid YAML playlist: {0}".format(ex))
+        if not isinstance(steps, list):
+            raise ValueError("A YAML playlist must be a list of steps")
+    else:
+        raise ValueError("Unknown playlist format: {0}. Try one of {1}".format(format, list(FORMATS)))
+    return [_step(step, number) for number, step in enumerate(steps, 1)]
+
+
+def _step(step, number):
+    if not isinstance(step, dict) or "action" not in step:
+        raise ValueError("Step {0}: must have an action".format(number))
+    unknown = set(step) - set(PlaylistStep._fields)
+    if unknown:
+        raise ValueError("Step {0}: unknown keys {1}".format(number, sorted(unknown)))
+    if step["action"] not in ACTIONS:
+        raise ValueError("Step {0}: unknown action {1}. Try one of {2}".format(number, step["action"], list(ACTIONS)))
+    args = step.get("args") or {}
+    if not isinstance(args, dict):
+        raise ValueError("Step {0}: args must be a mapping of argument names to values".format(number))
+    try:
+        repeat, delay = int(step.get("repeat", 1)), float(step.get("delay", 0))
+    except (TypeError, ValueError):
+        raise ValueError("Step {0}: repeat and delay must be numbers".format(number))
+    if repeat < 1:
+        raise ValueError("Step {0}: repeat must be at least 1".format(number))
+    if delay < 0:
+        raise ValueError("Step {0}: delay can't be negative".format(number))
+    return PlaylistStep(step["action"], args, repeat, delay)
+
+
+def load_playlist(path=None, format=None):
+    """
+    Read a playlist from a file, or from stdin if path is None or "-". Files ending .yaml or .yml are read as YAML.
+
+    Raises:
+        OSError: if the file can't be read
+        ValueError: if the playlist is invalid
+    """
+    if path is None or path == "-":
+        return parse_playlist(sys.stdin.read(), format)
+    if format is None and path.endswith((".yaml", ".yml")):
+        format = "yaml"
+    with open(path) as f:
+        return parse_playlist(f.read(), format)
+
+
+def utility_call(utility):
+    """
+    Run steps on a SenseHatUtility in this process. Steps share the utility, and each step's font is loaded if it's
+    not the one the step before used.
+
+    Returns:
+        A call for run_playlist()
+
+    Examples:
+        >>> from sense_hat_display_utils.utility import SenseHatUtility
+        >>> shu = SenseHatUtility(display="virtual")
+        >>> fonts = []
+        >>> def call(action, **args):
+        ...     utility_call(shu)(action, **args)
+        ...     fonts.append(shu._font_key[0].split("/")[-1])
+        >>> run_playlist(parse_playlist('''
+        ... {"action": "print", "args": {"message": "A"}}
+        ... {"action": "print", "args": {"message": "B", "font": "no-such-font.ttf"}}
+        ... {"action": "scroll", "args": {"message": "C", "speed": 0}}
+        ... '''), call)
+        3
+        >>> fonts
+        ['miniwi-8.pil', '<default>', 'miniwi-8.pil']
+
+    """
+    from sense_hat_display_utils.colours import Colour
+
+    def call(action, **args):
+        for name in COLOUR_ARGS:
+            if args.get(name) is not None:
+                args[name] = Colour(args[name])
+        getattr(utility, action)(**args)
+
+    return call
+
+
+def run_playlist(steps, call, sleep=time.sleep):
+    """
+    Run every step in order.
+
+    Args:
+        steps (list): PlaylistSteps, from parse_playlist() or load_playlist().
+        call (callable): Runs one action, called as call(action, **args), eg. utility_call(utility).
+        sleep (callable, optional): Waits between steps.
+
+    Returns:
+        The number of actions run
+
+    Examples:
+        >>> calls = []
+        >>> run_playlist(parse_playlist('{"action": "pulse", "args": {"colour": "red"}, "repeat": 2}'),
+        ...              lambda action, **args: calls.append((action, args)))
+        2
+        >>> calls
+        [('pulse', {'colour': 'red'}), ('pulse', {'colour': 'red'})]
+
+    """
+    count = 0
+    for step in steps:
+        for number in range(step.repeat):
+            call(step.action, **dict(step.args))
+            count += 1
+        if step.delay:
+            sleep(step.delay)
+    return count
@@ -0,0 +1,150 @@
+"""
+Rendering frames ahead of time on another thread, so a slow frame doesn't hold up the one being shown.
+
+    producer thread -> ring of lookahead + 1 Frames -> presenter (the calling thread) -> display
+
+The producer cuts or copies upcoming frames into free Frames from the ring, while the presenter sleeps until each frame
+is due, pushes it, and hands the Frame back to the producer. If a frame isn't ready when it's due, that's an underrun:
+the presenter waits for it, and FrameScheduler drops frames afterwards to catch up.
+"""
+import queue
+import threading
+
+from sense_hat_display_utils.frame import Frame
+
+_STOP = object()  # Wakes the producer up to finish
+
+
+class FramePresenter(object):
+    """
+    Shows a sequence of frames with the next few prepared ahead on a producer thread.
+
+    Examples:
+        >>> from sense_hat_display_utils.display import VirtualDisplay
+        >>> from sense_hat_display_utils.pacing import FrameScheduler
+        >>> from sense_hat_display_utils.strip import ScrollStrip
+        >>> display = VirtualDisplay()
+        >>> strip = ScrollStrip([[x, 0, 0] for y in range(8) for x in range(16)], 16, 8)
+        >>> presenter = FramePresenter(lookahead=2)
+        >>> presenter.run(strip, FrameScheduler(0), display.set_pixels)
+        >>> [frame.pixels[0][0] for frame in display.frames], presenter.stats()["shown"]
+        ([0, 1, 2, 3, 4, 5, 6, 7, 8], 9)
+
+        While a frame is showing, the producer fills the rest of the ring, so the next ones are ready before they're
+        due. Here the sleep between frames waits until it has, and each frame is shown with the next 2 already prepared:
+
+        >>> import threading
+        >>> prepared, changed = [], threading.Condition()
+        >>> class Frames(list):
+        ...     def __getitem__(self, index):  # Called on the producer thread
+        ...         with changed:
+        ...             prepared.append(index)
+        ...             changed.notify_all()
+        ...         return list.__getitem__(self, index)
+        >>> def sleep(seconds):
+        ...     with changed:
+        ...         changed.wait_for(lambda: len(prepared) >= min(8, presenter.shown + presenter.lookahead + 1), 5)
+        >>> ahead = []
+        >>> presenter = FramePresenter(lookahead=2)
+        >>> presenter.run(Frames(Frame.solid([index, 0, 0]) for index in range(8)),
+        ...               FrameScheduler(0.1, clock=lambda: 0.0, sleep=sleep),
+        ...               lambda frame: ahead.append(len(prepared) - frame[0][0] - 1))
+        >>> ahead[1:], presenter.underruns, prepared
+        ([2, 2, 2, 2, 2, 1, 0], 0, [0, 1, 2, 3, 4, 5, 6, 7])
+
+    """
+
+    def __init__(self, lookahead=2, profiler=None):
+        """
+        Args:
+            lookahead (int, optional): Frames to prepare ahead of the one being shown.
+            profiler (profiling.Profiler, optional): Times preparing frames as convert, and showing them as push.
+        """
+        self.lookahead = max(1, lookahead)
+        self.profiler = profiler
+        self.shown = 0
+        self.underruns = 0
+        self.skipped = 0  # Prepared, but dropped by the scheduler
+        self._free = queue.Queue()
+        self._ready = queue.Queue()
+        self._next = None  # A prepared (index, Frame) taken from _ready early
+        for slot in range(self.lookahead + 1):
+            self._free.put(None)  # Each slot's Frame is made the first time it's filled, at the size frames turn out
+
+    def stats(self):
+        """
+        Returns:
+            dict of frames shown, frames that weren't ready in time, and frames prepared but not needed
+        """
+        return {"lookahead": self.lookahead, "shown": self.shown, "underruns": self.underruns,
+                "skipped": self.skipped}
+
+    def run(self, frames, scheduler, show):
+        """
+        Show every frame on schedule, returning once the last one has been held for its period.
+
+        Args:
+            frames: Indexable sequence of frames, eg. a ScrollStrip or list of Frames.
+            scheduler (pacing.FrameScheduler): Decides when each frame is shown.
+            show (callable): Shows one frame, eg. SenseHatUtility._show_frame. It mustn't keep the Frame it's given.
+
+        """
+        producer = threading.Thread(target=self._produce, args=(frames, len(frames)), name="frame-producer",
+                                    daemon=True)
+        producer.start()
+        profiler = self.profiler
+        try:
+            if len(frames):
+                self._next = self._ready.get()  # Start the clock once the first frame is ready, not before
+            for index in scheduler.frames(len(frames)):
+                prepared, slot = self._take(index)
+                start = profiler.clock() if profiler is not None else 0
+                show(slot)
+                if profiler is not None:
+                    profiler.add("push", profiler.clock() - start)
+                self.shown += 1
+                self._free.put(slot)
+        finally:
+            self._free.put(_STOP)
+            producer.join()
+
+    def _take(self, index):
+        # Wait for frame index, recycling any frames before it that the scheduler dropped
+        while True:
+            item, self._next = self._next, None
+            if item is None:
+                try:
+                    item = self._ready.get_nowait()
+                except queue.Empty:
+                    self.underruns += 1
+                    item = self._ready.get()
+            prepared, slot = item
+            if isinstance(slot, Exception):
+                raise slot
+            if prepared == index:
+                return item
+            self.skipped += 1
+            self._free.put(slot)
+
+    def _produce(self, frames, count):
+        cut = frames.frame if hasattr(frames, "frame") else None  # A ScrollStrip cuts straight into the slot
+        profiler = self.profiler
+        try:
+            for index in range(count):
+                slot = self._free.get()
+                if slot is _STOP:
+                    return
+                start = profiler.clock() if profiler is not None else 0
+                if cut is not None:
+                    slot = cut(index, slot)
+                else:
+                    source = Frame.from_pixels(frames[index])
+                    if slot is None or (slot.width, slot.height) != (source.width, source.height):
+                        slot = source.copy()
+                    else:
+                        slot.buffer[:] = source.buffer
+                if profiler is not None:
+                    profiler.add("convert", profiler.clock() - start)
+                self._ready.put((index, slot))
+        except Exception as ex:
+            self._ready.put((None, ex))
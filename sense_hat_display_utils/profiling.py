@@ -0,0 +1,187 @@
+"""
+Where frame time goes: counters and latency histograms for each stage of showing frames.
+
+    render     drawing text, computing animation and fade frames, looking up icons
+    convert    turning rendered images into pixel lists and cutting frames out of scroll strips
+    push       handing frames to the display
+    wait       sleeping until the next frame is due
+    overshoot  how much longer than asked each sleep took
+
+Profiling is off unless a Profiler is attached, eg. SenseHatUtility.profiler = Profiler(), or --profile on the command
+line. Recording a timing is a few additions, so it's cheap enough to leave on in the field.
+"""
+import bisect
+import json
+import sys
+import threading
+import time
+
+STAGES = ("render", "convert", "push", "wait", "overshoot")
+# Upper bounds of the histogram buckets, in seconds. Anything longer goes in one more bucket at the end.
+BUCKETS = (0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+           1.0)
+
+
+class StageStats(object):
+    """
+    Count, total, maximum and a histogram of one stage's timings. Timings can be added from any thread, eg. the
+    lookahead producer's and a scroll pipeline's render thread.
+
+    Examples:
+        >>> stats = StageStats()
+        >>> for seconds in [0.001, 0.001, 0.003, 0.04]:
+        ...     stats.add(seconds)
+        >>> stats.count, stats.percentile(50), stats.percentile(95), stats.max
+        (4, 0.001, 0.04, 0.04)
+
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.histogram[bucket] += 1
+
+    def percentile(self, percent):
+        """
+        Returns:
+            The upper bound of the bucket the percentile falls in, or the maximum if that's lower
+        """
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKETS[bucket], self.max) if bucket < len(BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self):
+        with self._lock:
+            return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                    "max": self.max, "p50": self.percentile(50), "p95": self.percentile(95),
+                    "histogram": [[bound, count] for bound, count in zip(list(BUCKETS) + [None], self.histogram)]}
+
+
+class _Timer(object):
+    # Context manager timing one stage
+    __slots__ = ("profiler", "stage", "start")
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = self.profiler.clock()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.stage, self.profiler.clock() - self.start)
+
+
+class Profiler(object):
+    """
+    Collects StageStats for each of STAGES.
+
+    Examples:
+        >>> profiler = Profiler()
+        >>> with profiler.measure("render"):
+        ...     pass
+        >>> sleep = profiler.timed_sleep(lambda seconds: None)
+        >>> sleep(0.01)
+        >>> profiler.stats()["render"]["count"], profiler.stats()["wait"]["count"]
+        (1, 1)
+
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Args:
+            clock (callable, optional): High resolution time source.
+        """
+        self.clock = clock
+        self.stages = {stage: StageStats() for stage in STAGES}
+
+    def reset(self):
+        self.stages = {stage: StageStats() for stage in STAGES}
+
+    def add(self, stage, seconds):
+        """
+        Record one timing.
+
+        Args:
+            stage (str): One of STAGES.
+            seconds (float): How long it took.
+        """
+        self.stages[stage].add(seconds)
+
+    def measure(self, stage):
+        """
+        Returns:
+            A context manager that records how long its block takes as stage
+        """
+        return _Timer(self, stage)
+
+    def timed_sleep(self, sleep):
+        """
+        Wrap a sleep function, recording each sleep as wait, and the extra time it took over what was asked for as
+        overshoot.
+        """
+        def timed(seconds):
+            start = self.clock()
+            sleep(seconds)
+            waited = self.clock() - start
+            self.add("wait", waited)
+            self.add("overshoot", max(0.0, waited - seconds))
+
+        return timed
+
+    def stats(self):
+        """
+        Returns:
+            dict of stage: StageStats.as_dict()
+        """
+        return {stage: stats.as_dict() for stage, stats in self.stages.items()}
+
+    def summary(self):
+        """
+        Returns:
+            The stats as a table, in milliseconds
+        """
+        lines = ["{0:<10}{1:>8}{2:>12}{3:>10}{4:>10}{5:>10}{6:>10}".format(
+            "stage", "count", "total ms", "mean ms", "p50 ms", "p95 ms", "max ms")]
+        for stage, stats in self.stats().items():
+            lines.append("{0:<10}{1:>8}{2:>12.2f}{3:>10.3f}{4:>10.3f}{5:>10.3f}{6:>10.3f}".format(
+                stage, stats["count"], stats["total"] * 1000, stats["mean"] * 1000, stats["p50"] * 1000,
+                stats["p95"] * 1000, stats["max"] * 1000))
+        return "\n".join(lines)
+
+    def export(self, target):
+        """
+        Hand the stats on.
+
+        Args:
+            target: A callable, which is called with the stats() dict, or a path to write them to as JSON.
+        """
+        stats = self.stats()
+        if callable(target):
+            target(stats)
+        else:
+            with open(target, "w") as f:
+                json.dump(stats, f, indent=2)
+
+    def report(self, output=None):
+        """
+        Print the summary, to stderr by default.
+        """
+        print(self.summary(), file=output or sys.stderr)
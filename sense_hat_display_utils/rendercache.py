@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+from sense_hat_display_utils.strip import ScrollStrip
+
+_MAGIC = b"SHRC"
+_VERSION = 2
+_HEADER = struct.Struct("<4sBIHHH")  # magic, version, width, height, window width, window height
+_SUFFIX = ".strip"
+
+
+class RenderCache(object):
+    """
+    Bounded LRU cache of rendered scroll strips, keyed by a hash of everything that goes into rendering one.
+
+    Notifications tend to repeat the same few messages, and rendering is the expensive part of scrolling one. With a
+    directory, strips are also written to disk, so they survive restarts; the directory is kept under max_disk_bytes
+    by deleting the least recently used strips. It's safe to share between threads.
+
+    Examples:
+        >>> cache = RenderCache()
+        >>> key = cache.key("Hi", ("font.pil", 0), (255, 0, 0), (0, 0, 0), 0, 8, 8)
+        >>> cache.get(key) is None
+        True
+        >>> cache.put(key, ScrollStrip([[0, 0, 0]] * 128, 16, 8))
+        >>> len(cache.get(key)), cache.stats()["hit_rate"]
+        (9, 0.5)
+
+    """
+
+    DEFAULT_MAX_STRIPS = 64
+    DEFAULT_MAX_DISK_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, max_strips=DEFAULT_MAX_STRIPS, directory=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        """
+        Args:
+            max_strips (int, optional): Evict the least recently used strip from memory beyond this many.
+            directory (str, optional): Also keep strips in this directory. Created if it doesn't exist.
+            max_disk_bytes (int, optional): Evict the least recently used strips from directory beyond this size.
+        """
+        self.max_strips = max_strips
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._strips = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._strips)
+
+    def clear(self):
+        """
+        Empty the memory cache. Strips on disk are kept.
+        """
+        with self._lock:
+            self._strips.clear()
+
+    @staticmethod
+    def key(message, font_key, foreground, background, y, window_width, window_height):
+        """
+        Identify a rendering. Fonts are identified by their font_key, so clear the cache if a font file is replaced.
+
+        Returns:
+            Hex digest
+        """
+        content = [message, list(font_key), list(foreground), list(background), y, window_width, window_height]
+        return hashlib.sha1(json.dumps(content).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Fetch a strip from memory, or failing that from disk.
+
+        Args:
+            key (str): From key().
+
+        Returns:
+            ScrollStrip, or None if it isn't cached
+
+        """
+        with self._lock:
+            strip = self._strips.get(key)
+            if strip is not None:
+                self.hits += 1
+                self._strips.move_to_end(key)
+                return strip
+
+        strip = self._load(key)
+        with self._lock:
+            if strip is not None:
+                self.disk_hits += 1
+                self._remember(key, strip)
+                return strip
+            self.misses += 1
+        return None
+
+    def put(self, key, strip):
+        """
+        Cache a freshly rendered strip.
+
+        Args:
+            key (str): From key().
+            strip (ScrollStrip): The rendering. Don't change it after this.
+
+        Examples:
+            Strips for a tiled canvas wider than 255 pixels are kept on disk too
+
+            >>> import tempfile
+            >>> with tempfile.TemporaryDirectory() as directory:
+            ...     key = RenderCache.key("Hi", ("font.pil", 0), (255, 0, 0), (0, 0, 0), 0, 320, 8)
+            ...     RenderCache(directory=directory).put(key, ScrollStrip(bytes(640 * 8 * 3), 640, 8, 320, 8))
+            ...     strip = RenderCache(directory=directory).get(key)
+            >>> strip.width, strip.window_width, len(strip)
+            (640, 320, 321)
+
+        """
+        with self._lock:
+            self._remember(key, strip)
+        if self.directory is not None:
+            self._save(key, strip)
+
+    def stats(self):
+        """
+        Returns:
+            dict of cache sizes and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {"size": len(self._strips), "max_size": self.max_strips, "hits": self.hits,
+                     "disk_hits": self.disk_hits, "misses": self.misses, "evictions": self.evictions,
+                     "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0}
+        if self.directory is not None:
+            files = self._files()
+            stats.update({"disk_size": len(files), "disk_bytes": sum(size for path, size, used in files),
+                          "max_disk_bytes": self.max_disk_bytes, "disk_evictions": self.disk_evictions})
+        return stats
+
+    def _remember(self, key, strip):
+        # Called with the lock held
+        self._strips[key] = strip
+        if len(self._strips) > self.max_strips:
+            self._strips.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark it as recently used
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, width, height, window_width, window_height = _HEADER.unpack_from(data)
+        pixels = data[_HEADER.size:]
+        if magic != _MAGIC or version != _VERSION or len(pixels) != width * height * 3:
+            return None  # Written by another version; it'll be overwritten
+        return ScrollStrip(pixels, width, height, window_width, window_height)
+
+    def _save(self, key, strip):
+        try:
+            header = _HEADER.pack(_MAGIC, _VERSION, strip.width, strip.height, strip.window_width,
+                                  strip.window_height)
+        except struct.error:
+            return  # Too big to describe in the header, so it's only cached in memory
+        path = self._path(key)
+        temporary = "{0}.{1}.tmp".format(path, os.getpid())
+        try:
+            with open(temporary, "wb") as f:
+                f.write(header)
+                f.write(strip.data)
+            os.replace(temporary, path)  # So other processes never see half a strip
+        except OSError:
+            return  # A full or read-only disk shouldn't stop the message being shown
+        self._trim()
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:  # Evicted by another process
+                    continue
+                files.append((path, status.st_size, status.st_mtime))
+        return files
+
+    def _trim(self):
+        files = self._files()
+        total = sum(size for path, size, used in files)
+        for path, size, used in sorted(files, key=lambda file: file[2]):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.disk_evictions += 1
+
+
+RENDER_CACHE = RenderCache()  # Shared by every SenseHatUtility in the process, in memory only
@@ -0,0 +1,180 @@
+"""
+Long-running display daemon, and the client that talks to it.
+
+Requests and responses are single lines of JSON over a Unix domain socket:
+
+    -> {"action": "scroll", "args": {"message": "Hello", "colour": "#00ff00"}, "priority": 0, "ttl": null}
+    <- {"ok": true}
+
+Actions go through the SenseHatUtility message queue, so they never fight over
+the LEDs, and a higher priority request interrupts a lower priority one. The
+response is only sent once the action has finished on the display.
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+
+from sense_hat_display_utils.defaults import COLOUR_ARGS, DEFAULT_SOCKET, FINITE_ACTIONS
+
+
+class DisplayServerError(Exception):
+    """
+    Raised by the client when the server rejects or fails a request
+    """
+    pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                self.server.run_request(json.loads(line.decode("utf-8")))
+                response = {"ok": True}
+            except Exception as ex:
+                response = {"ok": False, "error": "{0}: {1}".format(type(ex).__name__, ex)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class DisplayServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Keeps one SenseHatUtility alive and runs actions sent to it over a Unix domain socket.
+
+    Each connection gets a thread, but actions are run one at a time by the utility's queue.
+    """
+
+    daemon_threads = True
+
+    ACTIONS = FINITE_ACTIONS
+    COLOUR_ARGS = COLOUR_ARGS
+
+    def __init__(self, utility, path=DEFAULT_SOCKET):
+        """
+        Args:
+            utility (SenseHatUtility): Runs the actions.
+            path (str, optional): Filesystem path of the socket. A stale socket left at this path is replaced.
+
+        Raises:
+            OSError: if something other than a stale socket is at path, eg. another server that's still running
+        """
+        self.utility = utility
+        remove_stale_socket(path)
+        super().__init__(path, _RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+    def run_request(self, request):
+        """
+        Run a single decoded request.
+
+        Args:
+            request (dict): {"action": name, "args": {keyword arguments for the action}, "priority": int, "ttl": seconds}
+
+        Raises:
+            ValueError: if the action isn't one the server runs
+            RuntimeError: if the action expired in the queue, or was interrupted by a higher priority one
+        """
+        from sense_hat_display_utils.colours import Colour
+
+        action = request.get("action")
+        if action not in self.ACTIONS:
+            raise ValueError("Unknown action: {0}".format(action))
+
+        args = dict(request.get("args") or {})
+        for name in self.COLOUR_ARGS:
+            if args.get(name) is not None:
+                args[name] = Colour(args[name])
+        if args.get("repeat") == -1:
+            raise ValueError("repeat -1 would block the server forever")
+
+        item = self.utility.enqueue(action, request.get("priority", 0), request.get("ttl"), **args)
+        item.wait()
+        if item.error is not None:
+            raise item.error
+        if item.expired:
+            raise RuntimeError("Expired before it could be shown")
+        if item.preempted:
+            raise RuntimeError("Interrupted by a higher priority action")
+
+
+def remove_stale_socket(path):
+    """
+    Remove a socket left behind by a server that's no longer running, so a new server can listen there.
+
+    Args:
+        path (str): Filesystem path of the socket.
+
+    Raises:
+        OSError: if path isn't a socket, or a server is still listening on it
+
+    Examples:
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     path = os.path.join(directory, "server.sock")
+        ...     stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        ...     stale.bind(path)
+        ...     stale.close()
+        ...     remove_stale_socket(path)
+        ...     os.path.exists(path)
+        False
+        >>> with tempfile.NamedTemporaryFile() as f:
+        ...     remove_stale_socket(f.name)  # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+        ...
+        OSError: ... exists and isn't a socket
+
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError("{0} exists and isn't a socket".format(path))
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError("A display server is already listening on {0}".format(path))
+
+
+def send(action, path=DEFAULT_SOCKET, priority=0, ttl=None, **kwargs):
+    """
+    Ask the server to run an action and wait until it's done.
+
+    Args:
+        action (str): Name of the action, eg. "scroll".
+        path (str, optional): Filesystem path of the server's socket.
+        priority (int, optional): Queue priority. Higher priorities interrupt lower ones.
+        ttl (float, optional): Give up if the action hasn't started within this many seconds.
+        **kwargs: Arguments for the action. Colours must be names or "#rrggbb" strings.
+
+    Raises:
+        DisplayServerError: if the server couldn't run the action
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        with client.makefile("rwb") as stream:
+            stream.write(json.dumps({"action": action, "args": kwargs, "priority": priority, "ttl": ttl}).encode("utf-8") + b"\n")
+            stream.flush()
+            response = stream.readline()
+    finally:
+        client.close()
+
+    if not response:
+        raise DisplayServerError("No response from server")
+    response = json.loads(response.decode("utf-8"))
+    if not response.get("ok"):
+        raise DisplayServerError(response.get("error"))
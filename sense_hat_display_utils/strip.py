@@ -0,0 +1,86 @@
+from sense_hat_display_utils.frame import Frame
+
+
+class ScrollStrip(object):
+    """
+    A message rendered once into a single wide strip of pixels.
+
+    Each scroll frame is a window over the strip, so scrolling a message only
+    costs one render, however many frames it takes to cross the display.
+
+    The strip is padded with one display width of background on each side, so
+    window 0 is a blank display with the text about to enter from the right and
+    the last window is a blank display after the text has left on the left.
+    """
+
+    def __init__(self, pixels, width, height, window_width=8, window_height=8):
+        """
+        Args:
+            pixels: Row-major r, g, b bytes, eg. from PIL's Image.tobytes(), or a list of [r, g, b] pixels,
+                `width` * `height` pixels long.
+            width (int): Width of the strip in pixels, including padding.
+            height (int): Height of the strip in pixels.
+            window_width (int): Width of the display.
+            window_height (int): Height of the display.
+
+        Examples:
+            >>> strip = ScrollStrip([[i, i, i] for i in range(24)], 12, 2, 8, 2)
+            >>> len(strip)
+            5
+            >>> strip.frame(1)
+            <Frame 8x2>
+            >>> [pixel[0] for pixel in strip.frame(1)]
+            [1, 2, 3, 4, 5, 6, 7, 8, 13, 14, 15, 16, 17, 18, 19, 20]
+
+        """
+        if not isinstance(pixels, (bytes, bytearray)):
+            pixels = bytes(value for pixel in pixels for value in pixel)
+        assert len(pixels) == width * height * 3
+        assert width >= window_width and height >= window_height
+        self.data = bytes(pixels)
+        self.width = width
+        self.height = height
+        self.window_width = window_width
+        self.window_height = window_height
+        self._view = memoryview(self.data)
+        # Byte offsets of the first pixel of each display row within the strip
+        self._rows = [row * width * 3 for row in range(window_height)]
+
+    def __len__(self):
+        """
+        Returns:
+            The number of frames needed to scroll the whole strip across the display.
+        """
+        return self.width - self.window_width + 1
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("frame index out of range")
+        return self.frame(index % len(self))
+
+    def frame(self, offset, out=None):
+        """
+        Cut a display-sized window out of the strip.
+
+        Args:
+            offset (int): Column of the strip shown in the leftmost column of the display.
+            out (Frame, optional): Cut it into this frame instead of a new one, if it's the display's size.
+
+        Returns:
+            Frame for the display
+        """
+        frame = out
+        if frame is None or (frame.width, frame.height) != (self.window_width, self.window_height):
+            frame = Frame(self.window_width, self.window_height)
+        buffer, view, row_bytes = frame.buffer, self._view, self.window_width * 3
+        for row, start in enumerate(self._rows):
+            start += offset * 3
+            buffer[row * row_bytes:(row + 1) * row_bytes] = view[start:start + row_bytes]
+        return frame
+
+    def frames(self):
+        """
+        Generate every frame of the scroll in order.
+        """
+        for offset in range(len(self)):
+            yield self.frame(offset)
@@ -1,48 +1,35 @@
+import contextlib
+import functools
 import os
 import sys
+import threading
 import time
-
-from PIL import Image, ImageDraw, ImageFont
-from colour import Color as _Color
-from sense_hat import SenseHat
-
-from sense_hat_display_utils.icons import SenseHatIconCollection
-
-
-class Colour(_Color):
-    def __getattr__(self, item):
-        """
-        This function exists because colour.Color is too clever for its own good
-         (actually, maybe I was being silly when I forgot to remove the reference - TODO: try removing this function)
-        Args:
-            item (str): name of attribute
-
-        Returns:
-            Reference to the attribute <item>
-
-        """
-        if item == "get_rgb_int":
-            return self.get_rgb_int()
-        else:
-            return super(Colour, self).__getattr__(item)
-
-    def __init__(self, color=None, **kwargs):
-        """
-        Is this necessary? Try removing it and seeing what happens!
-        Args:
-            color:
-            **kwargs:
-        """
-        super().__init__(color, **kwargs)
-
-    def get_rgb_int(self):
-        """
-        The only thing that the colour.Color library doesn't do!
-
-        Returns: The colour in (0-255) range for PIL compatibility
-
-        """
-        return tuple([int(float_colour * 255) for float_colour in self.get_rgb()])
+import traceback
+import weakref
+
+from PIL import Image, ImageFont
+
+from sense_hat_display_utils import defaults
+from sense_hat_display_utils.animation import compile_pattern
+from sense_hat_display_utils.animfile import play_animation
+from sense_hat_display_utils.blend import fade_sequence, solid
+from sense_hat_display_utils.colours import Colour
+from sense_hat_display_utils.display import DisplayBackend, get_display
+from sense_hat_display_utils.frame import Frame
+from sense_hat_display_utils.gamma import gamma_sequence, scale_gamma
+from sense_hat_display_utils.glyphs import ATLAS
+from sense_hat_display_utils.icons import ICONS, get_icon
+from sense_hat_display_utils.messagequeue import MessageQueue, Preempted, QueueItem
+from sense_hat_display_utils.pacing import FrameScheduler
+from sense_hat_display_utils.pipeline import ScrollPipeline
+from sense_hat_display_utils.presenter import FramePresenter
+from sense_hat_display_utils.rendercache import RENDER_CACHE
+from sense_hat_display_utils.strip import ScrollStrip
+
+FONT_CACHE_SIZE = 8  # Fonts kept loaded, so steps or requests that switch between fonts don't load them again
+_NOT_PROFILING = contextlib.nullcontext()
+_STOP_WORKER = QueueItem(None, {}, float("-inf"))  # Queued by close(), after everything else, to stop the worker
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 class SenseHatUtility(object):
@@ -50,29 +37,55 @@ class SenseHatUtility(object):
         This class wraps the SenseHat class to provide display-related functions
     """
 
-    DEFAULT_SPEED = 0.1  # speed is passed to time.sleep() to hold a frame
+    DEFAULT_SPEED = defaults.DEFAULT_SPEED  # Seconds between the start of one frame and the next
     WIDTH = 8  # Maybe if a SenseHat v2 comes out one day?
     HEIGHT = 8
     ZERO_BRIGHTNESS = 47  # offset. 47 == 0 in terms of Sense HAT's brightness.
-    DEFAULT_FONT = "fonts/miniwi-8.pil"  # https://github.com/josuah/miniwi
-    DEFAULT_FONT_SIZE = 6  # Bigger font, bigger size. AKA letter 'width' in the scroll function
-    DEFAULT_X_OFFSET = 0  # "Don't touch this" - MC Hammer
-    DEFAULT_Y_OFFSET = 0  # Some TrueType fonts have a lot of padding (to make room for accents?) and setting this to +/- 1 can make them fit better
-    DEFAULT_FOREGROUND = "white"  # The colour module supports colour names or web RGB notation (plus other ways of creating colours)
-    DEFAULT_BACKGROUND = "black"
+    DEFAULT_FONT = defaults.DEFAULT_FONT
+    DEFAULT_FONT_SIZE = defaults.DEFAULT_FONT_SIZE
+    DEFAULT_X_OFFSET = defaults.DEFAULT_X_OFFSET
+    DEFAULT_Y_OFFSET = defaults.DEFAULT_Y_OFFSET
+    DEFAULT_FOREGROUND = defaults.DEFAULT_FOREGROUND
+    DEFAULT_BACKGROUND = defaults.DEFAULT_BACKGROUND
 
-    def __init__(self, autorestore=True):
+    def __init__(self, autorestore=True, display="sense_hat", fb_device=None):
         """
         Initialise reference to SenseHat and take a copy of the current screen state.
 
         Args:
             autorestore (bool, optional): Restore initial screen state when destroyed. Defaults to True.
+            display (optional): "sense_hat" to go through the sense_hat library, "framebuffer" to write straight to
+                the memory-mapped framebuffer, "virtual" for an in-memory stand-in that records every frame, or an
+                object with the SenseHat display methods (see display.DisplayBackend). A DisplayBackend's width and
+                height are used for WIDTH and HEIGHT, so text can be rendered across a canvas.TiledCanvas.
+                Defaults to "sense_hat".
+            fb_device (str, optional): Framebuffer device (or stand-in file) for the "framebuffer" display.
+                Found automatically if not given.
         """
         self.autorestore = autorestore
-        self.sh = SenseHat()
+        self.sh = get_display(display, fb_device) if isinstance(display, str) else display
+        if isinstance(self.sh, DisplayBackend):  # Could be bigger than a Sense HAT, eg. a canvas.TiledCanvas
+            self.WIDTH = self.sh.width
+            self.HEIGHT = self.sh.height
         self._font = None
+        self._font_key = None
+        self.atlas = ATLAS
+        self.render_cache = RENDER_CACHE
         self._fade_backup = None
         self._backup = None
+        self._queue = MessageQueue()
+        self._worker = None
+        self._worker_lock = threading.Lock()  # Server handler threads can enqueue at the same time
+        self._closed = False
+        self._current = None
+        self.frame_stats = None  # FrameScheduler.stats() of the last animation
+        self._undimmed_gamma = None  # The gamma table before dim()
+        self._dim_level = 1.0
+        self._clock = time.monotonic  # Time sources for animations, replaced when exporting them (see animfile)
+        self._sleep = time.sleep
+        self.profiler = None  # A profiling.Profiler to time each stage of showing frames, or None not to
+        self.lookahead = 0  # Frames to prepare ahead on another thread (see presenter), or 0 to prepare each when due
+        self.underruns = 0  # Frames the presenter didn't have ready in time, over every animation
         self.__backup()
 
     def __del__(self):
@@ -81,9 +94,34 @@ class SenseHatUtility(object):
 
         """
         # self.fade_out(speed=0.01)
+        self.close()
+        self.sh = None
+
+    def close(self):
+        """
+        Stop the queue worker once it's run everything already queued, and restore the original display if autorestore
+        is set. Nothing more can be queued afterwards. Called when the utility is destroyed, if not before.
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.enqueue("show_icon", name="estelada")
+            <QueueItem show_icon priority=0>
+            >>> shu.close()
+            >>> shu._worker.is_alive(), shu.get_pixels() == shu._backup
+            (False, True)
+
+        """
+        with self._worker_lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            if worker is not None:
+                self._queue.put(_STOP_WORKER)
+        if worker is not None and worker is not threading.current_thread():
+            worker.join()
         if self.autorestore:
             self.__restore()
-        self.sh = None
 
     def __getattr__(self, item):
         """
@@ -101,7 +139,7 @@ class SenseHatUtility(object):
         Examples:
             This won't get called directly
 
-            >>> shu = SenseHatUtility()
+            >>> shu = SenseHatUtility(display="virtual")
             >>> shu.low_light = True
 
             >>> shu.low_light
@@ -121,31 +159,48 @@ class SenseHatUtility(object):
 
     def _set_font(self, font, font_size):
         """
-        Load the font and set self._font, fallback to default if any issues
+        Load the font and set self._font, fallback to default if any issues.
+        Also sets self._font_key, which identifies the font's glyphs in the atlas.
         Args:
             font: relative or absolute path to font file, TrueType or PIL format
             font_size: used for TrueType fonts
 
         Examples:
-            >>> shu = SenseHatUtility()
+            >>> shu = SenseHatUtility(display="virtual")
             >>> shu._set_font(shu.DEFAULT_FONT, shu.DEFAULT_FONT_SIZE)
+            >>> os.path.basename(shu._font_key[0]), shu._font_key[1]
+            ('miniwi-8.pil', 0)
 
-            >>> shu._get_font().file.split("/")[-1].split(".")[0] == shu.DEFAULT_FONT.split("/")[-1].split(".")[0]
-            True
+            >>> shu._set_font("no-such-font.pil", shu.DEFAULT_FONT_SIZE)
+            >>> shu._font_key
+            ('<default>', 0)
 
         """
         try:
-            if os.path.isabs(font):
-                full_font_path = font
-            else:
-                full_font_path = "{0}{1}{2}".format(os.path.dirname(os.path.abspath(__file__)), os.sep, font)
-
-            if font[-3:] == "ttf":
-                self._font = ImageFont.truetype(full_font_path, font_size)
-            elif font[-3:] == "pil":
-                self._font = ImageFont.load(full_font_path)
+            self._font, self._font_key = _load_font(*_font_key(font, font_size))
         except Exception as ex:
             self._font = ImageFont.load_default()
+            self._font_key = ("<default>", 0)
+
+    def _use_font(self, font, font_size):
+        """
+        Switch to font, unless it's the one already in use. Fonts that were used before come from a cache, and their
+        glyphs are still in the atlas.
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu._use_font(shu.DEFAULT_FONT, shu.DEFAULT_FONT_SIZE)
+            >>> font = shu._font
+            >>> shu._use_font("no-such-font.pil", shu.DEFAULT_FONT_SIZE)
+            >>> shu._font_key
+            ('<default>', 0)
+            >>> shu._use_font(shu.DEFAULT_FONT, shu.DEFAULT_FONT_SIZE)
+            >>> shu._font is font
+            True
+
+        """
+        if self._font is None or _font_key(font, font_size) != self._font_key:
+            self._set_font(font, font_size)
 
     def _get_font(self):
         """
@@ -154,11 +209,11 @@ class SenseHatUtility(object):
             ImageFont object
 
         Examples:
-            >>> shu = SenseHatUtility()
+            >>> shu = SenseHatUtility(display="virtual")
             >>> shu._get_font() #doctest: +ELLIPSIS
             <PIL.ImageFont.ImageFont object at 0x...>
 
-            >>> shu._get_font().file.split("/")[-1].split(".")[0] == shu.DEFAULT_FONT.split("/")[-1].split(".")[0]
+            >>> os.path.basename(shu._font_key[0]) == os.path.basename(shu.DEFAULT_FONT)
             True
 
         """
@@ -193,23 +248,89 @@ class SenseHatUtility(object):
         Returns:
 
         """
-        # Set the font if not already done
-        if self._font is None and (font is not self.DEFAULT_FONT or font_size is not self.DEFAULT_FONT_SIZE):
-            self._set_font(font, font_size)
+        self._use_font(font, font_size)
         font = self._get_font()
 
-        # The image to output
-        image = Image.new("RGB", (self.WIDTH, self.HEIGHT),
-                          colour.get_rgb_int() if invert else background_colour.get_rgb_int())
+        with self._measure("render"):
+            # The image to output
+            image = Image.new("RGB", (self.WIDTH, self.HEIGHT),
+                              colour.get_rgb_int() if invert else background_colour.get_rgb_int())
 
-        # The drawing utility
-        draw = ImageDraw.Draw(image)
+            # Draw the text on the image from the glyph atlas. Calling strip() to keep to a single line
+            self.atlas.draw(image, (x, y), message.strip(),
+                            background_colour.get_rgb_int() if invert else colour.get_rgb_int(), font, self._font_key)
 
-        # Draw the text on the image. Calling strip() to avoid passing a multiline string to draw.text, which causes an exception with the default fallback font
-        draw.text((x, y), message.strip(), background_colour.get_rgb_int() if invert else colour.get_rgb_int(), font)
+        with self._measure("convert"):
+            frame = Frame.from_image(image)
 
         # Output the image to the Sense HAT
-        self.sh.set_pixels(list(map(list, image.getdata())))
+        with self._measure("push"):
+            self.sh.set_pixels(frame)
+
+    def _text_width(self, message, font):
+        """
+        Measure how many pixels wide message is when drawn in font.
+
+        Args:
+            message (str): The text to measure.
+            font: ImageFont object to measure with.
+
+        Returns:
+            Width of the text in pixels (int)
+
+        """
+        return self.atlas.measure(message, font, self._font_key)
+
+    def _render_strip(self,
+                      message,
+                      colour=Colour(DEFAULT_FOREGROUND),
+                      background_colour=Colour(DEFAULT_BACKGROUND),
+                      y=DEFAULT_Y_OFFSET,
+                      invert=False
+                      ):
+        """
+        Render the whole message once into a strip that frames can be cut from. Strips are cached in render_cache, so
+        a message that's been shown before isn't rendered again.
+
+        Args:
+            message (str): The text to render.
+            colour: The colour to display in
+            background_colour: The colour to display _on_
+            y: The y position to draw at. Usually used to slightly reposition fonts.
+            invert: Invert the colours (black text on <colour> background).
+
+        Returns:
+            ScrollStrip
+
+        """
+        font = self._get_font()
+        message = message.strip()
+        foreground, background = colour.get_rgb_int(), background_colour.get_rgb_int()
+        if invert:
+            foreground, background = background, foreground
+
+        key = self.render_cache.key(message, self._font_key, foreground, background, y, self.WIDTH, self.HEIGHT)
+        strip = self.render_cache.get(key)
+        if strip is not None:
+            return strip
+
+        # Pad with a screen's worth of background either side, so the text scrolls in from the right and out to the left
+        with self._measure("render"):
+            width = self.WIDTH + self._text_width(message, font) + self.WIDTH
+            image = Image.new("RGB", (width, self.HEIGHT), background)
+            self.atlas.draw(image, (self.WIDTH, y), message, foreground, font, self._font_key)
+
+        with self._measure("convert"):
+            strip = ScrollStrip(image.tobytes(), width, self.HEIGHT, self.WIDTH, self.HEIGHT)
+        self.render_cache.put(key, strip)
+        return strip
+
+    def cache_stats(self):
+        """
+        Returns:
+            dict of the glyph atlas's and render cache's stats()
+        """
+        return {"glyphs": self.atlas.stats(), "renders": self.render_cache.stats()}
 
     def _scroll(self,
                 message,
@@ -220,35 +341,45 @@ class SenseHatUtility(object):
                 invert=False,
                 font=DEFAULT_FONT,
                 font_size=DEFAULT_FONT_SIZE,
+                coalesce="none",
                 **kwargs
                 ):
-        if self._font is None:
-            self._set_font(font, font_size)
+        self._use_font(font, font_size)
 
         if message is None:
-            # Then read from stdin instead
-            for line in sys.stdin:
-                self._scroll(line, colour, background_colour, speed, font_y_offset, invert)
+            # Then read from stdin instead, rendering each line while the one before it scrolls
+            pipeline = ScrollPipeline(self, coalesce)
+            pipeline.run(sys.stdin, speed, colour=colour, background_colour=background_colour, y=font_y_offset,
+                         invert=invert)
         else:
-            # Start off-screen (self.WIDTH), end at the approximate end of message ( -(length*size) ), stepping backwards (-1)
-            for position in range(self.WIDTH, (-1 * len(message) * font_size), -1):
-                self.print(message, colour, background_colour, position, font_y_offset, invert)
-                time.sleep(speed)
+            # Render once, then step a display-sized window along the strip until the text has scrolled off
+            self._animate(self._render_strip(message, colour, background_colour, font_y_offset, invert), speed)
 
     def scroll(self, repeat=1, **kwargs):
         for number in range(0, repeat):
             self._scroll(**kwargs)
 
+    def show_pixels(self, pixels, **kwargs):
+        """
+        Show a frame that's already rendered, eg. one tile of a canvas.TiledCanvas sent from another Pi.
+
+        Args:
+            pixels (list): WIDTH * HEIGHT [r, g, b] pixels
+
+        """
+        self._show_frame(pixels)
+
     def show_icon(self, name, **kwargs):
         """
-        Load an icon by name and show it.
+        Load an icon by name and show it. Registered icons are searched first, then loaded icon packs.
 
         Args:
             name: Name of icon
 
         """
-        icon = SenseHatIconCollection()
-        self.sh.set_pixels(icon[name].pixels)
+        pixels = get_icon(name).pixels
+        with self._measure("push"):
+            self.sh.set_pixels(pixels)
 
     def show_clock(self, **kwargs):
         """
@@ -258,23 +389,80 @@ class SenseHatUtility(object):
             **kwargs: unused
 
         """
-        icon = SenseHatIconCollection()
-        self.sh.set_pixels(icon.clock().pixels)
+        with self._measure("render"):
+            pixels = ICONS.clock().pixels
+        with self._measure("push"):
+            self.sh.set_pixels(pixels)
         if self.autorestore:  # Hold it for a visible amount of time
-            time.sleep(5)
-
-    # Obsoleted by --repeat = -1
-    # def show_clock_forever(self, **kwargs):
-    #     """
-    #     Show the clock until interrupted by CTRL+C
-    #
-    #     Args:
-    #         **kwargs: unused
-    #
-    #     """
-    #     while True:
-    #         self.show_clock(**kwargs)
-    #         time.sleep(30)
+            self._timed_sleep()(5)
+
+    def play(self, name, repeat=1, **kwargs):
+        """
+        Play an animation file (see animfile). Its frames are already rendered, so this just pushes them.
+
+        Args:
+            name (str): Path of the animation file.
+            repeat: Number of repetitions
+
+        Raises:
+            ValueError: if the file isn't an animation file
+
+        """
+        play_animation(self.sh, name, repeat, self._show_frame, self._clock, self._sleep)
+
+    def live_clock(self, duration=None, clock=time.time, sleep=None, **kwargs):
+        """
+        Keep the clock up to date, waking only on the minute its face next changes and pushing only new faces.
+        The face has 8 hour and 16 minute positions, so that's once every few minutes.
+
+        Args:
+            duration (float, optional): Seconds to run for. Defaults to forever.
+            clock (callable, optional): Wall clock time, in seconds since the epoch.
+            sleep (callable, optional): Waits for a number of seconds. Defaults to the utility's sleep. Timed as wait
+                if profiling.
+            **kwargs: unused
+
+        Returns:
+            Number of faces pushed
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> now = [time.mktime((2024, 1, 1, 12, 0, 0, 0, 1, -1))]
+            >>> def fake_sleep(seconds):
+            ...     now[0] += seconds
+            >>> shu.live_clock(3600, clock=lambda: now[0], sleep=fake_sleep)
+            18
+
+            >>> from sense_hat_display_utils.profiling import Profiler
+            >>> shu.profiler = Profiler()
+            >>> shu.live_clock(600, clock=lambda: now[0], sleep=fake_sleep)
+            4
+            >>> [shu.profiler.stats()[stage]["count"] for stage in ("render", "push", "wait")]
+            [4, 4, 3]
+
+        """
+        sleep = self._timed_sleep(sleep)
+        end = None if duration is None else clock() + duration
+        shown = None
+        pushes = 0
+        while True:
+            self._frame_boundary()
+            now = clock()
+            local = time.localtime(now)
+            hhmm = "{0:02d}{1:02d}".format(local.tm_hour, local.tm_min)
+            with self._measure("render"):
+                face = ICONS.clock(hhmm)
+            if face is not shown:
+                with self._measure("push"):
+                    self.sh.set_pixels(face.pixels)
+                shown = face
+                pushes += 1
+            wait = ICONS.clock_unchanged_for(hhmm) * 60 - min(local.tm_sec, 59) - now % 1
+            if end is not None:
+                if now >= end:
+                    return pushes
+                wait = min(wait, end - now)
+            sleep(max(0.0, wait))
 
     def _xy2px(self, x, y):
         """
@@ -325,7 +513,7 @@ class SenseHatUtility(object):
         Examples:
 
 
-            >>> shu = SenseHatUtility()
+            >>> shu = SenseHatUtility(display="virtual")
             >>> shu._xy2px(-2, 2)
             18
             >>> shu._xy2px(-4, 4)
@@ -359,94 +547,382 @@ class SenseHatUtility(object):
         p = a + (b * 8)
         return p
 
-    def pulse(self, colour, speed, repeat, **kwargs):
+    def pulse(self, colour, speed=DEFAULT_SPEED, repeat=1, **kwargs):
         """
-        Pulse a colour from 4 pixels lit in the middle to all-but-4 pixels lit.
+        Pulse a colour from 4 pixels lit in the middle to all-but-the-corners lit.
 
         Args:
             colour:
-            speed: value to time.sleep() for
+            speed: Seconds per frame
             repeat: Number of repetitions
             **kwargs:
 
-        Returns:
+        Examples:
+            >>> from sense_hat_display_utils.profiling import Profiler
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.profiler = Profiler()
+            >>> shu.pulse(Colour("red"), speed=0)
+            >>> [shu.profiler.stats()[stage]["count"] for stage in ("render", "convert", "push")]
+            [1, 8, 8]
 
         """
-        c = list(colour.get_rgb_int())
+        self.animate("diamond", colour, speed, repeat)
 
-        # Draw in one quadrant and copy it to the others
-        count_reverse_at = int(self.WIDTH / 2)  # 4
+    def animate(self, pattern, colour, speed=DEFAULT_SPEED, repeat=1, frame_count=None, **kwargs):
+        """
+        Play a procedural animation: one of "ring", "ripple", "spiral", "radar" or "diamond" (the pulse).
 
-        for i in range(1, repeat + 1):
-            for j in range(1, count_reverse_at + 1):  # Grow
-                frame = self._pulse_get_frame(c, j)
-                self.sh.set_pixels(frame)
-                time.sleep(speed)
-            for j in range(count_reverse_at, 1 - 1, -1):  # Shrink
-                frame = self._pulse_get_frame(c, j)
-                self.sh.set_pixels(frame)
-                time.sleep(speed)
+        Each animation is only computed once per colour and frame count, however many times it's repeated.
+
+        Args:
+            pattern (str): One of animation.PATTERNS.
+            colour: The colour at full brightness
+            speed: Seconds per frame
+            repeat: Number of repetitions
+            frame_count (int, optional): Frames per repetition. Defaults to the pattern's own (16, or 8 for diamond).
 
-    def _pulse_get_frame(self, colour, frame_number):
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.animate("radar", Colour("lime"), speed=0, repeat=2)
+            >>> len(shu.sh.frames)
+            32
+
+        """
+        with self._measure("render"):
+            frames = compile_pattern(pattern, tuple(colour.get_rgb_int()), frame_count)
+        clock = self._scheduler(speed)
+        for i in range(repeat):
+            self._animate(frames, speed, clock)
+
+    def fade_out(self, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
         """
-        Calculates which pixels need to be on for a given frame
+        Fade out the display
+
         Args:
-            colour: The colour to light the pixels
-            frame_number: The frame number to calculate pixels for
+            speed: Seconds per fade step
+            steps (int, optional): Number of fade steps. Defaults to one per 2 levels of the brightest channel.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
 
         Returns:
-            frame (list)
 
         """
-        frame = 64 * [[0, 0, 0]]
-        # draw from x=-j to j
-        for pix in range(-frame_number, frame_number + 1):
-            if pix is not 0:
-                if -4 < pix < 4:  # Don't set the outermost corner pixels
-                    self._pulse_set_pixels(frame, pix, -pix, colour)
-                # draw along x and y axes
-                self._pulse_set_pixels(frame, 1, pix, colour)
-                if pix < -2 or pix > 2:  # draw along x,y=2 axes
-                    self._pulse_set_pixels(frame, 2, pix, colour)
-        return frame
+        self._fade_backup = self.sh.get_pixels()
+        self._fade(self._fade_backup, solid([0, 0, 0], len(self._fade_backup)), speed, steps, easing)
 
-    def _pulse_set_pixels(self, frame, x, y, colour):
+    def fade_to(self, colour, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
         """
-        Sets a pixel and it's 4 mirrors (horizontally and vertically)
+        Fade the display to a solid colour
+
+        Args:
+            colour: The colour to end on
+            speed: Seconds per fade step
+            steps (int, optional): Number of fade steps. Defaults to one per 2 levels of the biggest change.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+        """
+        start = self.sh.get_pixels()
+        self._fade(start, solid(colour.get_rgb_int(), len(start)), speed, steps, easing)
+
+    def crossfade(self, target=None, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
+        """
+        Cross-fade from what's on the display to another frame
+
+        Args:
+            target (list, optional): 64 [r, g, b] pixels to end on. Defaults to the display as it was before this
+                SenseHatUtility started using it.
+            speed: Seconds per fade step
+            steps (int, optional): Number of fade steps. Defaults to one per 2 levels of the biggest change.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.sh.set_pixels(solid([100, 0, 0]))
+            >>> shu.crossfade(solid([0, 0, 100]), speed=0, steps=2)
+            >>> [frame.pixels[0] for frame in shu.sh.frames[-2:]]
+            [[50, 0, 50], [0, 0, 100]]
+
+        """
+        self._fade(self.sh.get_pixels(), self._backup if target is None else target, speed, steps, easing)
+
+    def _fade(self, start, end, speed, steps, easing):
+        with self._measure("render"):
+            frames = self._fade_frames(start, end, steps, easing)
+        self._animate(frames, speed)
+
+    @staticmethod
+    def _fade_frames(start, end, steps, easing):
+        if steps is None:
+            # Change the biggest-changing channel by 2 per step
+            steps = max(abs(a - b) for pixel_a, pixel_b in zip(start, end) for a, b in zip(pixel_a, pixel_b)) // 2
+        return fade_sequence(start, end, steps, easing)
+
+    def gamma_fade_out(self, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
+        """
+        Fade out the display by dimming the gamma table, then blank it and put the gamma table back.
+
+        Args:
+            speed: Seconds per fade step
+            steps (int, optional): Number of fade steps. Defaults to 32, one per gamma level.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.sh.clear(255, 255, 255)
+            >>> shu.gamma_fade_out(speed=0, steps=4)
+            >>> [frame.gamma[-1] for frame in shu.sh.frames[-6:]], shu.sh.get_pixels()[0]
+            ([23, 16, 8, 0, 0, 31], [0, 0, 0])
+
+        """
+        with self._original_gamma() as gamma:
+            self._animate(gamma_sequence(gamma, 1.0, 0.0, steps or 32, easing), speed, show=self._show_gamma)
+            self.sh.clear()
+
+    def gamma_fade_in(self, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
+        """
+        Fade in what's on the display from black by brightening the gamma table.
+
+        Args:
+            speed: Seconds per fade step
+            steps (int, optional): Number of fade steps. Defaults to 32, one per gamma level.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+        """
+        with self._original_gamma() as gamma:
+            self.sh.gamma = scale_gamma(gamma, 0.0)
+            self._animate(gamma_sequence(gamma, 0.0, 1.0, steps or 32, easing), speed, show=self._show_gamma)
+
+    def gamma_pulse(self, speed=DEFAULT_SPEED, repeat=1, steps=None, level=None, easing="linear", **kwargs):
+        """
+        Pulse the brightness of what's on the display down and back up, leaving the pixels alone.
+
+        Args:
+            speed: Seconds per step
+            repeat: Number of repetitions
+            steps (int, optional): Number of steps each way. Defaults to 8.
+            level (float, optional): Brightness at the bottom of the pulse, 0-1. Defaults to 0 (off).
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
+
+        """
+        steps, level = steps or 8, level or 0.0
+        with self._original_gamma() as gamma:
+            tables = gamma_sequence(gamma, 1.0, level, steps, easing) + gamma_sequence(gamma, level, 1.0, steps, easing)
+            clock = self._scheduler(speed)
+            for i in range(repeat):
+                self._animate(tables, speed, clock, show=self._show_gamma)
+
+    def dim(self, level=None, speed=DEFAULT_SPEED, steps=None, easing="linear", **kwargs):
+        """
+        Dim (or undim) everything on the display by scaling the gamma table. Stays in effect until dim(1.0).
+
         Args:
-            frame: The frame to work on
-            x: The x coordinate of the initial pixel to set
-            y: The y coordinate of the initial pixel to set
-            colour: The colour to set the pixel
+            level (float, optional): Brightness, 0 (off) to 1 (normal). Defaults to 0.5.
+            speed: Seconds per step
+            steps (int, optional): Number of steps to get there. 0 changes straight away. Defaults to 8.
+            easing (str, optional): One of blend.EASINGS. Defaults to "linear".
 
+        """
+        level = 0.5 if level is None else level
+        if self._undimmed_gamma is None:
+            self._undimmed_gamma = self.sh.gamma
+        self._animate(gamma_sequence(self._undimmed_gamma, self._dim_level, level, max(1, 8 if steps is None else steps),
+                                     easing), speed, show=self._show_gamma)
+        self._dim_level = level
+        if level >= 1.0:
+            self._undimmed_gamma = None
+
+    @contextlib.contextmanager
+    def _original_gamma(self):
+        """
+        Put the gamma table back however an effect ends.
+
+        Yields:
+            The gamma table when the effect started
+        """
+        original = self.sh.gamma
+        try:
+            yield original
+        finally:
+            self.sh.gamma = original
+
+    def _animate(self, frames, speed, clock=None, show=None):
+        """
+        Show a sequence of frames, one every speed seconds, dropping frames rather than running slow.
+
+        Args:
+            frames: Indexable sequence of frames, eg. a list or ScrollStrip.
+            speed (float): Seconds per frame.
+            clock (FrameScheduler, optional): Carry on this scheduler's timeline, eg. across repeats.
+            show (callable, optional): Shows one frame. Defaults to _show_frame, and with lookahead, frames are prepared
+                ahead on another thread.
+
+        Examples:
+            Frames are prepared while the one before is showing, here for 20 ms each on a clock that never falls
+            behind, so none are late:
+
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.lookahead = 2
+            >>> shu._clock, shu._sleep = lambda: 0.0, lambda seconds: time.sleep(0.02)
+            >>> shu.pulse(Colour("red"), speed=0.1, repeat=2)
+            >>> len(shu.sh.frames), shu.frame_stats["lookahead"], shu.frame_stats["underruns"]
+            (16, 2, 0)
+
+        """
+        clock = clock or self._scheduler(speed)
+        profiler = self.profiler
+        presenter = None
+        try:
+            if self.lookahead and show is None:
+                presenter = FramePresenter(self.lookahead, profiler)
+                presenter.run(frames, clock, self._show_frame)
+                return
+            show = show or self._show_frame
+            if profiler is None:
+                for index in clock.frames(len(frames)):
+                    show(frames[index])
+            else:
+                timer = profiler.clock
+                for index in clock.frames(len(frames)):
+                    start = timer()
+                    frame = frames[index]  # Cutting a window out of a ScrollStrip is the conversion
+                    cut = timer()
+                    show(frame)
+                    profiler.add("convert", cut - start)
+                    profiler.add("push", timer() - cut)
+        finally:
+            self.frame_stats = clock.stats()
+            if presenter is not None:
+                self.underruns += presenter.underruns
+                self.frame_stats.update(presenter.stats())
+
+    def _scheduler(self, speed):
+        """
         Returns:
-            Modifies frame list in-place
+            A FrameScheduler for an animation at speed seconds per frame, timing its sleeps if profiling
+        """
+        return FrameScheduler(speed, self._clock, self._timed_sleep())
 
+    def _timed_sleep(self, sleep=None):
         """
-        for a in [x, -x]:
-            frame[self._xy2px(a, y)] = colour
-            frame[self._xy2px(y, a)] = colour
+        Args:
+            sleep (callable, optional): Waits for a number of seconds. Defaults to the utility's sleep.
 
-    def fade_out(self, speed=DEFAULT_SPEED, **kwargs):
+        Returns:
+            sleep, timing each wait if profiling
         """
-        Fade out the display
+        sleep = sleep or self._sleep
+        return sleep if self.profiler is None else self.profiler.timed_sleep(sleep)
+
+    def _measure(self, stage):
+        """
+        Returns:
+            A context manager timing its block as one of profiling.STAGES, which does nothing unless profiling
+        """
+        return _NOT_PROFILING if self.profiler is None else self.profiler.measure(stage)
+
+    def _frame_boundary(self):
+        """
+        Called between the frames of an animation, where queued actions can be preempted.
+
+        Raises:
+            Preempted: if this animation is running from the queue and a higher priority item is waiting
+
+        """
+        current = self._current
+        if current is not None and threading.current_thread() is self._worker:
+            waiting = self._queue.highest_priority()
+            if waiting is not None and waiting > current.priority:
+                raise Preempted()
+
+    def _show_frame(self, frame):
+        """
+        Push one frame of an animation to the display.
 
         Args:
-            speed: passed to time.sleep() in between fade steps
+            frame (list): 64 [r, g, b] pixels
+
+        Raises:
+            Preempted: if this animation is running from the queue and a higher priority item is waiting
+
+        """
+        self._frame_boundary()
+        self.sh.set_pixels(frame)
+
+    def _show_gamma(self, gamma):
+        """
+        Set the gamma table for one step of a brightness effect.
+
+        Args:
+            gamma (list): 32 gamma values, each 0-31
+
+        Raises:
+            Preempted: if this effect is running from the queue and a higher priority item is waiting
+
+        """
+        self._frame_boundary()
+        self.sh.gamma = gamma
+
+    def enqueue(self, action, priority=0, ttl=None, resume=False, **kwargs):
+        """
+        Queue an action to be run by the background worker, which runs one action at a time, highest priority first.
+
+        A running animation is interrupted at the next frame when something with a higher priority is queued.
+
+        Args:
+            action (str): Name of the action, eg. "scroll".
+            priority (int, optional): Higher numbers run first. Defaults to 0.
+            ttl (float, optional): Drop the item if it hasn't started within this many seconds. Defaults to waiting forever.
+            resume (bool, optional): Run the item again from the start if it's preempted. Defaults to False.
+            **kwargs: Arguments for the action.
 
         Returns:
+            QueueItem, which can be wait()ed on
+
+        Raises:
+            ValueError: if the action isn't one of the utility's
+            RuntimeError: if the utility has been closed
+
+        Examples:
+            >>> shu = SenseHatUtility(display="virtual")
+            >>> shu.enqueue("show_icon", name="estelada").wait()
+            True
 
         """
-        step = 2
-        steps = 256
-        fade = self._fade_backup = self.sh.get_pixels()
-        for i in range(0, steps, step):
-            fade = [[max(0, r - step), max(0, g - step), max(0, b - step)] for r, g, b in fade]
-            self.sh.set_pixels(fade)
-            if all([x == [0, 0, 0] for x in fade]):  # If all pixels are black then exit
-                # if all([all([r < zb, g < zb, b < zb]) for i in fade for r, g, b in [i]]):  # This wasn't working.
-                break
-            time.sleep(speed)
+        if action[:1] == "_" or not callable(getattr(type(self), action, None)):
+            raise ValueError("Unknown action: {0}".format(action))
+        item = QueueItem(action, kwargs, priority, ttl, resume)
+        with self._worker_lock:
+            if self._closed:
+                raise RuntimeError("Can't queue {0}: the utility has been closed".format(action))
+            if self._worker is None:
+                self._worker = threading.Thread(target=_queue_worker, args=(weakref.ref(self), self._queue),
+                                                name="SenseHatUtility queue", daemon=True)
+                self._worker.start()
+            self._queue.put(item)
+        return item
+
+    def _run_queued(self, item):
+        """
+        Run one item from the queue on the worker thread, and mark it finished unless it's been put back to resume.
+
+        Args:
+            item (QueueItem): The item to run.
+
+        """
+        self._current = item
+        try:
+            getattr(self, item.action)(**item.kwargs)
+        except Preempted:
+            if item.resume:
+                item.expires = None  # It's already waited its turn once
+                self._queue.put(item)
+                return
+            item.preempted = True
+        except Exception as ex:
+            item.error = ex
+            traceback.print_exc()
+        finally:
+            self._current = None
+        item.finish()
 
     def __backup(self):
         self._backup = self.sh.get_pixels()
@@ -455,6 +931,55 @@ class SenseHatUtility(object):
         self.sh.set_pixels(self._backup)
 
 
+def _font_path(font):
+    """
+    Find a font file. Relative paths are looked for in the package, then the directory above it, which is where fonts/
+    is in a source checkout.
+
+    Returns:
+        Absolute path, in the package if the font isn't found
+    """
+    if os.path.isabs(font):
+        return font
+    for directory in (_PACKAGE_DIR, os.path.dirname(_PACKAGE_DIR)):
+        path = os.path.join(directory, font)
+        if os.path.exists(path):
+            return path
+    return os.path.join(_PACKAGE_DIR, font)
+
+
+def _font_key(font, font_size):
+    # Identifies a font's glyphs in the atlas: its absolute path and point size, which is 0 for bitmap fonts as they only
+    # come in one size
+    return _font_path(font), font_size if font[-3:] == "ttf" else 0
+
+
+@functools.lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font(path, font_size):
+    # Returns (ImageFont, font key). Raises if the font can't be loaded
+    if path[-3:] == "ttf":
+        return ImageFont.truetype(path, font_size), (path, font_size)
+    if path[-3:] == "pil":
+        return ImageFont.load(path), (path, 0)
+    raise ValueError("Not a TrueType or PIL font: {0}".format(path))
+
+
+def _queue_worker(utility_ref, queue):
+    # Only holds a weak reference to the utility between items, so the utility can still be destroyed and restore the
+    # display while the worker waits for more
+    while True:
+        item = queue.get()
+        if item is _STOP_WORKER:
+            return
+        utility = utility_ref()
+        if utility is None:
+            item.error = RuntimeError("The utility was destroyed before {0} could run".format(item.action))
+            item.finish()
+            continue
+        utility._run_queued(item)
+        del utility
+
+
 if __name__ == '__main__':
     import doctest
 
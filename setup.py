@@ -25,9 +25,14 @@ setup(
     packages=find_packages(exclude=['contrib', 'docs', 'tests']),
     install_requires=['sense-hat',
                       'Pillow',
-                      'colour',
                       # 'RTIMU'
                       ],
+    extras_require={
+        # Only needed for colour notations beyond names, #rrggbb and rgb()
+        'colour': ['colour'],
+        # Only needed for YAML playlists
+        'yaml': ['PyYAML'],
+    },
     dependency_links=[
         # "https://github.com/RPi-Distro/RTIMULib.git#egg=version_subpkg&subdirectory=Linux/python"
     ],